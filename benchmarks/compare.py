@@ -0,0 +1,51 @@
+# benchmarks/compare.py
+"""
+比较两次基准测试结果（按中位数）
+
+    python -m benchmarks.compare old.json new.json --threshold 0.1
+
+有阶段变慢超过阈值时返回码为 1，可用于在发布前拦截性能回退。
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+
+def load_results(path: str) -> Dict[Tuple[str, str], dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    return {(result['scale'], result['stage']): result for result in report.get('results', [])}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.compare', description="比较两次基准测试结果")
+    parser.add_argument('baseline', help="基准结果 JSON")
+    parser.add_argument('current', help="当前结果 JSON")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="判定为变慢的相对阈值（默认 0.1，即慢 10%%）")
+    args = parser.parse_args(argv)
+
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+    regressions = 0
+    print(f"{'规模':<14}{'阶段':<18}{'基准(ms)':>12}{'当前(ms)':>12}{'变化':>10}")
+    for key in sorted(baseline.keys() & current.keys()):
+        old = baseline[key]['median']
+        new = current[key]['median']
+        change = (new - old) / old if old else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  变慢'
+            regressions += 1
+        elif change < -args.threshold:
+            flag = '  变快'
+        print(f"{key[0]:<14}{key[1]:<18}{old * 1000:>12.1f}{new * 1000:>12.1f}{change:>+10.1%}{flag}")
+
+    for key in sorted(baseline.keys() ^ current.keys()):
+        print(f"{key[0]:<14}{key[1]:<18}（只在一份结果中出现）")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+# benchmarks/run.py
+"""
+基准测试：在合成数据上分别计时 扫描/匹配、重命名、单次检查 和 批量汇总报告
+
+    python -m benchmarks.run --scales 100x4x2,500x8x2 --repeat 3 --output results.json
+
+每个规模点先生成一次数据；会改动文件的阶段每次都在数据的新副本上运行（复制不计时），
+处理器每次都使用全新的配置目录，缓存不会跨轮次生效，测的是冷启动耗时。
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from core.file_renamer import FileRenamer
+from core.processor import HomeworkProcessor
+from core.roster_loader import load_roster_index
+from core.startup import warm_up
+
+from .synthetic import Scale, generate
+
+DEFAULT_SCALES = ('100x4x2', '500x8x2', '2000x12x2')
+STAGES = ('roster_load', 'collect', 'collect_indexed', 'rename', 'process_homework', 'batch_report')
+RENAME_FORMAT = {'template': '{学号}_{姓名}{扩展名}', 'is_folder': False}
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _quiet(message: str):
+    """被测操作的日志不输出（打印本身的耗时会干扰计时）"""
+
+
+class StageRunner:
+    """一个规模点上各阶段的计时；setup 部分（复制数据、读取花名册）不计入耗时"""
+
+    def __init__(self, workdir: str, roster_path: str, parent_dir: str):
+        self.workdir = workdir
+        self.roster_path = roster_path
+        self.parent_dir = parent_dir
+        self.first_lab = sorted(os.listdir(parent_dir))[0]
+        self._round = 0
+
+    def _fresh_dir(self, name: str) -> str:
+        self._round += 1
+        path = os.path.join(self.workdir, f"round{self._round}", name)
+        os.makedirs(path)
+        return path
+
+    def _copy(self, source: str) -> str:
+        target = os.path.join(self._fresh_dir('data'), os.path.basename(source))
+        shutil.copytree(source, target)
+        return target
+
+    def _processor(self, use_scan_index: bool = False) -> HomeworkProcessor:
+        return HomeworkProcessor(config_dir=self._fresh_dir('config'), use_scan_index=use_scan_index)
+
+    def prepare(self, stage: str) -> Callable[[], object]:
+        """准备一轮计时，返回只包含被测操作的函数"""
+        if stage == 'roster_load':
+            return lambda: load_roster_index(self.roster_path)
+
+        if stage in ('collect', 'collect_indexed'):
+            # collect_indexed：启用增量扫描索引，先完整扫描一遍建立索引，再计时重复扫描
+            processor = self._processor(use_scan_index=stage == 'collect_indexed')
+            matcher = load_roster_index(self.roster_path).matcher
+            lab_dirs = [os.path.join(self.parent_dir, lab) for lab in sorted(os.listdir(self.parent_dir))]
+
+            def collect():
+                result = [processor._collect_submitted_files(lab_dir, matcher, False, _quiet)
+                          for lab_dir in lab_dirs]
+                processor._save_scan_index()
+                return result
+
+            if processor.scan_index is not None:
+                collect()
+            return collect
+
+        if stage == 'rename':
+            roster = load_roster_index(self.roster_path)
+            roster.ensure_matcher()
+            lab_dir = self._copy(os.path.join(self.parent_dir, self.first_lab))
+            renamer = FileRenamer(journal_dir=self._fresh_dir('journals'))
+            return lambda: renamer.rename_files(roster, lab_dir, RENAME_FORMAT, _quiet)
+
+        if stage == 'process_homework':
+            processor = self._processor()
+            lab_dir = self._copy(os.path.join(self.parent_dir, self.first_lab))
+            output_dir = self._fresh_dir('output')
+            return lambda: processor.process_homework(self.roster_path, lab_dir, output_dir, RENAME_FORMAT,
+                                                        log_callback=_quiet)
+
+        if stage == 'batch_report':
+            processor = self._processor()
+            parent_dir = self._copy(self.parent_dir)
+            return lambda: processor.batch_check_submissions(self.roster_path, parent_dir, log_callback=_quiet)
+
+        raise ValueError(f"未知阶段：{stage}（可选：{', '.join(STAGES)}）")
+
+    def time(self, stage: str, repeat: int) -> List[float]:
+        times = []
+        for _ in range(repeat):
+            operation = self.prepare(stage)
+            gc.collect()
+            start = time.perf_counter()
+            operation()
+            times.append(time.perf_counter() - start)
+        return times
+
+
+def environment() -> Dict[str, Optional[str]]:
+    """记录运行环境，便于比较不同提交/机器上的结果"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def run_benchmarks(scales: List[Scale], stages: List[str], repeat: int = 3, seed: int = 0,
+                   workdir: Optional[str] = None, log=print) -> Dict:
+    """
+    依次运行各规模点的各阶段
+    :return: {'environment': ..., 'results': [{'scale', 'stage', 'times', 'min', 'median'}, ...]}
+    """
+    # 先导入 numpy 等重型模块，避免首个被测阶段把导入耗时算进去
+    warm_up().join()
+    results = []
+    base_dir = workdir or tempfile.mkdtemp(prefix='homework_bench_')
+    try:
+        for scale in scales:
+            scale_dir = os.path.join(base_dir, str(scale))
+            start = time.perf_counter()
+            roster_path, parent_dir = generate(os.path.join(scale_dir, 'source'), scale, seed)
+            log(f"[{scale}] 生成数据 {time.perf_counter() - start:.2f} 秒")
+            runner = StageRunner(scale_dir, roster_path, parent_dir)
+            for stage in stages:
+                times = runner.time(stage, repeat)
+                result = {
+                    'scale': str(scale), 'students': scale.students, 'labs': scale.labs,
+                    'files': scale.files, 'stage': stage, 'times': times,
+                    'min': min(times), 'median': statistics.median(times),
+                }
+                results.append(result)
+                log(f"[{scale}] {stage:<17} 最短 {result['min'] * 1000:9.1f} ms  中位 {result['median'] * 1000:9.1f} ms")
+    finally:
+        if workdir is None:
+            shutil.rmtree(base_dir, ignore_errors=True)
+    return {'environment': environment(), 'repeat': repeat, 'seed': seed, 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description="作业检查基准测试")
+    parser.add_argument('--scales', default=','.join(DEFAULT_SCALES),
+                        help="规模点，学生数x实验数x每人文件数，逗号分隔（默认 %(default)s）")
+    parser.add_argument('--stages', default=','.join(STAGES), help="要运行的阶段（默认全部）")
+    parser.add_argument('--repeat', type=int, default=3, help="每个阶段重复次数（默认 3）")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子（默认 0）")
+    parser.add_argument('--workdir', help="数据目录（默认使用临时目录并在结束后删除）")
+    parser.add_argument('--output', '-o', help="结果 JSON 文件路径")
+    args = parser.parse_args(argv)
+
+    scales = [Scale.parse(text) for text in args.scales.split(',') if text]
+    stages = [stage for stage in args.stages.split(',') if stage]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"未知阶段：{', '.join(unknown)}（可选：{', '.join(STAGES)}）")
+
+    report = run_benchmarks(scales, stages, args.repeat, args.seed, args.workdir)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# benchmarks/synthetic.py
+"""生成基准测试用的合成花名册和作业目录（固定随机种子，结果可复现）"""
+import os
+import random
+from typing import List, NamedTuple, Tuple
+
+SURNAMES = ('王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程'
+            '苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵')
+COMPOUND_SURNAMES = ('欧阳', '司马', '上官', '诸葛', '东方')
+GIVEN_CHARS = ('伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰萍红鹏飞宇浩然子轩梓涵一诺欣怡'
+               '思远嘉豪雨桐佳琪俊杰晨阳文博志强海燕立新建国春梅晓东振华天佑若曦泽宇语嫣锦程')
+MAJORS = ('计算机科学与技术', '软件工程', '电子信息工程', '数学与应用数学', '物联网工程')
+EXTENSIONS = ('.docx', '.pdf', '.zip', '.doc', '.pptx')
+ROSTER_COLUMNS = ('学号', '姓名', '班级', '专业', '性别', '手机号')
+
+
+class Scale(NamedTuple):
+    """规模点：学生数 × 实验数 × 每人文件数"""
+    students: int
+    labs: int
+    files: int
+
+    @classmethod
+    def parse(cls, text: str) -> 'Scale':
+        """解析 '500x8x2' 形式的规模"""
+        students, labs, files = (int(part) for part in text.lower().split('x'))
+        return cls(students, labs, files)
+
+    def __str__(self) -> str:
+        return f"{self.students}x{self.labs}x{self.files}"
+
+
+def make_students(count: int, rng: random.Random) -> List[tuple]:
+    """生成花名册行（姓名不重复，学号为 入学年份+学院+序号）"""
+    rows = []
+    used = set()
+    while len(rows) < count:
+        surname = rng.choice(COMPOUND_SURNAMES) if rng.random() < 0.02 else rng.choice(SURNAMES)
+        name = surname + ''.join(rng.choice(GIVEN_CHARS) for _ in range(rng.choice((1, 2, 2))))
+        if name in used:
+            continue
+        used.add(name)
+        number = len(rows)
+        rows.append((
+            f"20{21 + number % 4}{number // 400 % 100:02d}{number:05d}",
+            name,
+            f"{number // 40 + 1}班",
+            rng.choice(MAJORS),
+            rng.choice(('男', '女')),
+            f"1{rng.randint(3, 9)}{rng.randint(0, 999999999):09d}",
+        ))
+    return rows
+
+
+def write_roster(path: str, rows: List[tuple]):
+    """写出花名册（按扩展名写 xlsx 或 csv）"""
+    if path.endswith('.csv'):
+        import csv
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(ROSTER_COLUMNS)
+            writer.writerows(rows)
+        return
+
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('花名册')
+    worksheet.append(ROSTER_COLUMNS)
+    for row in rows:
+        worksheet.append(list(row))
+    workbook.save(path)
+
+
+def submission_names(student: tuple, lab: int, files: int, rng: random.Random) -> List[str]:
+    """一个学生在一次实验中提交的文件名（命名风格各异，部分带版本号或重复提交）"""
+    student_id, name, class_name = student[0], student[1], student[2]
+    styles = (
+        f"{student_id}{name}",
+        f"{student_id} {name}",
+        f"{name}_实验{lab}",
+        f"实验{lab}-{student_id}-{name}",
+        f"{class_name}_{name}_实验报告",
+        f"{name}",
+    )
+    base = rng.choice(styles)
+    names = []
+    for index in range(files):
+        extension = rng.choice(EXTENSIONS)
+        if index == 0:
+            names.append(base + extension)
+        elif rng.random() < 0.5:
+            names.append(f"{base}({index}){extension}")  # 重复提交
+        else:
+            names.append(f"{base}_v{index + 1}{extension}")
+    return names
+
+
+def make_homework_tree(root: str, students: List[tuple], labs: int, files: int,
+                       rng: random.Random, submit_rate: float = 0.85,
+                       folder_rate: float = 0.05, noise_per_lab: int = 5) -> List[str]:
+    """
+    在 root 下生成 实验1 … 实验M 子文件夹
+    每个实验约 submit_rate 的学生提交 files 个文件（少数以文件夹形式提交），
+    另外混入无法匹配的杂项文件和 Office 临时文件（~$ 开头）。
+    :return: 实验文件夹名列表
+    """
+    lab_names = []
+    for lab in range(1, labs + 1):
+        lab_name = f"实验{lab}"
+        lab_dir = os.path.join(root, lab_name)
+        os.makedirs(lab_dir, exist_ok=True)
+        lab_names.append(lab_name)
+        for student in students:
+            if rng.random() >= submit_rate:
+                continue
+            for file_name in submission_names(student, lab, files, rng):
+                if rng.random() < folder_rate:
+                    os.makedirs(os.path.join(lab_dir, os.path.splitext(file_name)[0]), exist_ok=True)
+                    continue
+                with open(os.path.join(lab_dir, file_name), 'w', encoding='utf-8') as f:
+                    f.write(file_name)
+            if rng.random() < 0.02:
+                with open(os.path.join(lab_dir, f"~${student[1]}.docx"), 'w') as f:
+                    f.write('lock')
+        for index in range(noise_per_lab):
+            with open(os.path.join(lab_dir, f"未命名文档{index + 1}.txt"), 'w', encoding='utf-8') as f:
+                f.write('noise')
+    return lab_names
+
+
+def generate(root: str, scale: Scale, seed: int = 0, roster_name: str = '花名册.xlsx') -> Tuple[str, str]:
+    """
+    生成一个规模点的完整数据
+    :return: (花名册路径, 作业母文件夹路径)
+    """
+    rng = random.Random(f"{seed}-{scale}")
+    os.makedirs(root, exist_ok=True)
+    students = make_students(scale.students, rng)
+    roster_path = os.path.join(root, roster_name)
+    write_roster(roster_path, students)
+    parent_dir = os.path.join(root, '作业')
+    make_homework_tree(parent_dir, students, scale.labs, scale.files, rng)
+    return roster_path, parent_dir
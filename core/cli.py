@@ -0,0 +1,288 @@
+# core/cli.py
+"""
+无界面命令行入口（python -m core），适用于服务器定时任务
+不导入 tkinter；处理器等重量级模块在解析完参数后才导入。
+
+用法示例：
+    python -m core check job.json
+    python -m core rename job.yaml --homework-dir "D:/item of BCP/PROJECT 1"
+    python -m core batch job.json --max-workers 8
+    python -m core undo --homework-dir "D:/item of BCP/PROJECT 1"
+    python -m core --stats stats.json --trace trace.json check job.json
+
+任务文件（JSON 或 YAML）字段：
+    roster_path, homework_dir, output_dir, parent_dir,
+    format_name 或 rename_format（{"template": ..., "is_folder": ...}），
+    selected_folders, use_saved_selection, max_workers, rename_workers,
+    content_hash（check 时比对文件内容）, hash_algorithm（xxhash / blake2b）,
+    report_format（xlsx / csv / parquet / jsonl，默认 xlsx）,
+    max_depth（递归查找提交的子目录层数，默认 0）, ignore_globs（递归时忽略的名称通配符列表）,
+    use_scan_index（启用增量扫描索引，默认 false）
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+from .name_template import TemplateError
+from .report_sink import REPORT_FORMATS
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+class JobError(Exception):
+    """任务配置错误（缺少字段、文件无法解析等）"""
+
+
+def load_job_file(path: str) -> Dict:
+    """读取 JSON 或 YAML 任务文件"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except OSError as e:
+        raise JobError(f"无法读取任务文件: {e}")
+
+    if path.lower().endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise JobError("读取 YAML 任务文件需要安装 PyYAML（pip install pyyaml），或改用 JSON")
+        try:
+            job = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise JobError(f"YAML 解析失败: {e}")
+    else:
+        try:
+            job = json.loads(text)
+        except ValueError as e:
+            raise JobError(f"JSON 解析失败: {e}")
+
+    if not isinstance(job, dict):
+        raise JobError("任务文件的顶层必须是对象（键值对）")
+    return job
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m core", description="作业检查与重命名（命令行模式）")
+    parser.add_argument('--config-dir', default='config', help="配置目录（格式、缓存等），默认 config")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不输出处理日志")
+    parser.add_argument('--stats', metavar='FILE',
+                        help="记录各阶段耗时与计数，结束后把汇总写入 JSON 文件（- 为标准输出）")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="记录各阶段耗时并写出 Chrome 跟踪文件（chrome://tracing / Perfetto 打开）")
+
+    subparsers = parser.add_subparsers(dest='command', metavar='{check,rename,batch,undo}')
+    subparsers.required = True
+
+    def add_common(sub):
+        sub.add_argument('job', nargs='?', help="任务文件（.json / .yaml）")
+        sub.add_argument('--roster', dest='roster_path', help="花名册文件")
+        sub.add_argument('--format', dest='format_name', help="重命名格式名称（来自格式配置）")
+        sub.add_argument('-q', '--quiet', action='store_true', default=argparse.SUPPRESS, help="不输出处理日志")
+
+    def add_report_format(sub):
+        sub.add_argument('--report-format', dest='report_format', choices=REPORT_FORMATS,
+                         help="报告格式（默认 xlsx；csv/jsonl 不需要 openpyxl，parquet 需要 pyarrow）")
+
+    def add_discovery(sub):
+        sub.add_argument('--max-depth', dest='max_depth', type=int,
+                         help="递归查找提交的子目录层数（如 班级/姓名/作业.docx 需要 2），默认 0")
+        sub.add_argument('--ignore', dest='ignore_globs', nargs='+', metavar='GLOB',
+                         help="递归查找时额外忽略的名称或相对路径通配符（始终忽略 .* __MACOSX ~$* 等）")
+        sub.add_argument('--scan-index', dest='use_scan_index', action='store_true', default=None,
+                         help="启用增量扫描索引：重复检查同一文件夹时只重新匹配新增或变化的条目")
+
+    check = subparsers.add_parser('check', help="检查未交/重复提交并重命名")
+    add_common(check)
+    add_report_format(check)
+    add_discovery(check)
+    check.add_argument('--homework-dir', dest='homework_dir', help="作业文件夹")
+    check.add_argument('--output-dir', dest='output_dir', help="报告输出目录")
+    check.add_argument('--content-hash', dest='content_hash', action='store_true', default=None,
+                       help="比对文件内容，标记完全相同的重复提交和不同学生之间的相同文件")
+    check.add_argument('--hash-algorithm', dest='hash_algorithm', choices=['xxhash', 'blake2b'],
+                       help="内容哈希算法（默认已安装 xxhash 时用 xxhash，否则 blake2b）")
+
+    rename = subparsers.add_parser('rename', help="仅重命名文件")
+    add_common(rename)
+    rename.add_argument('--homework-dir', dest='homework_dir', help="作业文件夹")
+
+    batch = subparsers.add_parser('batch', help="批量检查多个实验子文件夹并生成汇总")
+    add_common(batch)
+    add_report_format(batch)
+    add_discovery(batch)
+    batch.add_argument('--parent-dir', dest='parent_dir', help="母文件夹（包含多个实验子文件夹）")
+    batch.add_argument('--folders', dest='selected_folders', nargs='+', help="要扫描的子文件夹（按顺序）")
+    batch.add_argument('--max-workers', dest='max_workers', type=int, help="并发扫描的线程数")
+    batch.add_argument('--rename-workers', dest='rename_workers', type=int,
+                       help="并发重命名子文件夹的线程数（默认与 --max-workers 相同）")
+    batch.add_argument('--use-saved-selection', dest='use_saved_selection', action='store_true', default=None,
+                       help="使用界面中为该母文件夹保存的子文件夹选择")
+
+    undo = subparsers.add_parser('undo', help="撤销作业文件夹最近一次重命名")
+    undo.add_argument('job', nargs='?', help="任务文件（.json / .yaml）")
+    undo.add_argument('--homework-dir', dest='homework_dir', help="作业文件夹")
+    undo.add_argument('-q', '--quiet', action='store_true', default=argparse.SUPPRESS, help="不输出处理日志")
+    return parser
+
+
+def resolve_job(args: argparse.Namespace) -> Dict:
+    """合并任务文件与命令行参数（命令行优先）"""
+    job = load_job_file(args.job) if args.job else {}
+    if getattr(args, 'format_name', None) is not None:
+        # 命令行的 --format 覆盖任务文件中直接给出的 rename_format
+        job.pop('rename_format', None)
+    for key, value in vars(args).items():
+        if key in ('job', 'command', 'config_dir', 'quiet', 'stats', 'trace'):
+            continue
+        if value is not None:
+            job[key] = value
+    return job
+
+
+def _require(job: Dict, keys: List[str]):
+    missing = [key for key in keys if not job.get(key)]
+    if missing:
+        raise JobError(f"任务缺少必要字段: {', '.join(missing)}")
+
+
+def _rename_format(job: Dict, config_manager, required: bool) -> Optional[dict]:
+    """从任务中取得重命名格式：直接给出的 rename_format 优先，其次按 format_name 查找（命令行 --format 已在 resolve_job 中去掉了任务文件的 rename_format）"""
+    rename_format = job.get('rename_format')
+    if rename_format is not None:
+        if not isinstance(rename_format, dict) or 'template' not in rename_format:
+            raise JobError("rename_format 必须包含 template 字段")
+        return rename_format
+
+    format_name = job.get('format_name')
+    if format_name:
+        rename_format = config_manager.get_format_config(format_name)
+        if not rename_format:
+            raise JobError(f"找不到重命名格式: {format_name}")
+        return rename_format
+
+    if required:
+        raise JobError("任务缺少 format_name 或 rename_format")
+    return None
+
+
+def _checked_format(job: Dict, config_manager, processor, required: bool) -> Optional[dict]:
+    """
+    取得重命名格式，并在开始处理前按花名册编译一次模板
+    模板有误时抛出 TemplateError，由 main 作为用法错误报告（处理器不会再记录一遍）
+    """
+    rename_format = _rename_format(job, config_manager, required)
+    if rename_format is not None:
+        processor.file_renamer.compile_format(rename_format, processor.load_roster(job['roster_path']))
+    return rename_format
+
+
+def run_job(command: str, job: Dict, config_dir: str, log_callback, instrumentation=None) -> int:
+    """
+    执行任务，返回退出码
+    :param instrumentation: 分阶段计时与计数（Instrumentation），None 为关闭
+    """
+    from .config_manager import ConfigManager
+    from .processor import HomeworkProcessor
+
+    config_manager = ConfigManager(config_dir)
+    processor = HomeworkProcessor(config_dir, use_scan_index=bool(job.get('use_scan_index', False)))
+    processor.set_instrumentation(instrumentation)
+
+    if command == 'check':
+        _require(job, ['roster_path', 'homework_dir', 'output_dir'])
+        processor.process_homework(
+            roster_path=job['roster_path'],
+            homework_dir=job['homework_dir'],
+            output_dir=job['output_dir'],
+            rename_format=_checked_format(job, config_manager, processor, required=True),
+            log_callback=log_callback,
+            content_hash=bool(job.get('content_hash', False)),
+            hash_algorithm=job.get('hash_algorithm'),
+            report_format=job.get('report_format'),
+            max_depth=int(job.get('max_depth', 0)),
+            ignore_globs=job.get('ignore_globs')
+        )
+    elif command == 'rename':
+        _require(job, ['roster_path', 'homework_dir'])
+        count = processor.rename_files_only(
+            roster_path=job['roster_path'],
+            homework_dir=job['homework_dir'],
+            rename_format=_checked_format(job, config_manager, processor, required=True),
+            log_callback=log_callback
+        )
+        log_callback(f"重命名完成，共处理 {count} 个文件")
+    elif command == 'undo':
+        _require(job, ['homework_dir'])
+        processor.undo_last_rename(job['homework_dir'], log_callback=log_callback)
+    elif command == 'batch':
+        _require(job, ['roster_path', 'parent_dir'])
+        selected_folders = job.get('selected_folders')
+        if not selected_folders and job.get('use_saved_selection'):
+            folder_config = config_manager.load_folder_config(job['parent_dir'])
+            if folder_config:
+                selected_folders = folder_config.get('selected_folders')
+        processor.batch_check_submissions(
+            roster_path=job['roster_path'],
+            parent_dir=job['parent_dir'],
+            rename_format=_checked_format(job, config_manager, processor, required=False),
+            selected_folders=selected_folders,
+            log_callback=log_callback,
+            max_workers=int(job.get('max_workers', 1)),
+            rename_workers=int(job.get('rename_workers', job.get('max_workers', 1))),
+            report_format=job.get('report_format'),
+            max_depth=int(job.get('max_depth', 0)),
+            ignore_globs=job.get('ignore_globs')
+        )
+    return EXIT_OK
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    def log_callback(message: str):
+        if not args.quiet:
+            print(message, flush=True)
+
+    instrumentation = None
+    if args.stats or args.trace:
+        from .instrumentation import Instrumentation
+        instrumentation = Instrumentation()
+
+    try:
+        job = resolve_job(args)
+        return run_job(args.command, job, args.config_dir, log_callback, instrumentation)
+    except (JobError, TemplateError) as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        print("已中断。", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        print(f"处理失败：{e}", file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        if instrumentation is not None:
+            _write_instrumentation(instrumentation, args.stats, args.trace, log_callback)
+
+
+def _write_instrumentation(instrumentation, stats_path: Optional[str], trace_path: Optional[str],
+                           log_callback):
+    """输出耗时统计：日志中显示文字汇总，并按参数写出 JSON 汇总和 Chrome 跟踪文件"""
+    instrumentation.finish()
+    for line in instrumentation.format_summary():
+        log_callback(line)
+    try:
+        if stats_path == '-':
+            print(instrumentation.to_json())
+        elif stats_path:
+            with open(stats_path, 'w', encoding='utf-8') as f:
+                f.write(instrumentation.to_json())
+        if trace_path:
+            instrumentation.write_chrome_trace(trace_path)
+    except OSError as e:
+        print(f"写入耗时统计失败：{e}", file=sys.stderr)
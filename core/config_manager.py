@@ -1,16 +1,40 @@
 
+import atexit
+import copy
 import json
 import os
 import datetime
 import hashlib
-from typing import Dict, List, Optional
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .json_store import write_atomic
+
+# 保存配置后延迟写盘的时间（秒），期间的多次保存合并为一次写入
+CONFIG_WRITE_DELAY = 0.5
 
 class ConfigManager:
-    def __init__(self, config_dir: str = "config"):
+    def __init__(self, config_dir: str = "config", write_delay: float = CONFIG_WRITE_DELAY,
+                 error_callback: Optional[Callable[[Exception], None]] = None):
+        """
+        :param write_delay: 保存后延迟写盘的秒数（0 为立即写入）；程序退出时未写出的配置会自动写出
+        :param error_callback: 延迟写盘失败时调用（在定时器线程中）；None 时只打印错误
+        """
         self.config_dir = config_dir
         self.app_config_file = os.path.join(config_dir, "app_config.json")
         self.format_config_file = os.path.join(config_dir, "format_config.json")
         self.current_vars_file = os.path.join(config_dir, "current_variables.json")  # 新增：存储当前变量
+        self.folder_config_file = os.path.join(config_dir, "folder_configs.json")
+
+        # 内存缓存：文件路径 → ((修改时间, 大小), 解析后的数据)，文件被外部修改时自动失效
+        self.write_delay = write_delay
+        self._cache: Dict[str, tuple] = {}
+        self._pending: Dict[str, Any] = {}  # 已保存但尚未写盘的数据
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self.error_callback = error_callback
+        self.last_flush_error: Optional[Exception] = None  # 最近一次写盘失败的错误（写盘成功后清空）
+        atexit.register(self.flush)
 
         self._ensure_config_dir()
         self._ensure_default_formats()
@@ -28,6 +52,7 @@ class ConfigManager:
                 "标准格式(文件夹)": {"template": "{学号} {姓名}", "is_folder": True},
             }
             self._save_json(self.format_config_file, default_formats)
+            self.flush()
 
     # --- 核心：管理当前花名册变量 ---
     def set_current_roster_columns(self, columns: List[str]):
@@ -142,47 +167,86 @@ class ConfigManager:
 
     def _load_folder_configs(self) -> dict:
         """专用方法：加载文件夹配置数据"""
-        # 为文件夹配置创建专门的文件
-        folder_config_file = os.path.join(self.config_dir, "folder_configs.json")
-        
-        try:
-            if os.path.exists(folder_config_file):
-                with open(folder_config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # 确保返回的是字典
-                    if isinstance(data, dict):
-                        return data
-        except Exception:
-            pass
-        
-        # 如果文件不存在或读取失败，返回空字典
-        return {}
+        data = self._load_json(self.folder_config_file)
+        # 确保返回的是字典（文件不存在或读取失败时返回空字典）
+        return data if isinstance(data, dict) else {}
 
     def _save_folder_configs(self, data: dict):
         """专用方法：保存文件夹配置数据"""
-        folder_config_file = os.path.join(self.config_dir, "folder_configs.json")
-        
-        try:
-            with open(folder_config_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            raise Exception(f"保存文件夹配置失败: {str(e)}")
+        self._save_json(self.folder_config_file, data)
 
-    # --- 底层JSON读写 ---
+    # --- 底层JSON读写（带内存缓存） ---
     def _load_json(self, filepath: str) -> Optional[Dict]:
-        """加载JSON文件"""
-        try:
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception:
-            pass
-        return None
+        """
+        加载JSON文件
+        文件的修改时间和大小未变时直接返回缓存（只需一次 stat）；返回副本，调用方修改不影响缓存
+        """
+        with self._lock:
+            if filepath in self._pending:
+                return copy.deepcopy(self._pending[filepath])
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                self._cache.pop(filepath, None)
+                return None
+            key = (stat.st_mtime_ns, stat.st_size)
+            cached = self._cache.get(filepath)
+            if cached is None or cached[0] != key:
+                try:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except Exception:
+                    return None
+                cached = (key, data)
+                self._cache[filepath] = cached
+            return copy.deepcopy(cached[1])
 
     def _save_json(self, filepath: str, data: Dict):
-        """保存JSON文件"""
+        """保存JSON文件：先更新内存，再延迟写盘（短时间内的多次保存只写一次）"""
+        with self._lock:
+            self._pending[filepath] = copy.deepcopy(data)
+            if self.write_delay <= 0:
+                self.flush()
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.write_delay, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """
+        立即写出所有尚未写盘的配置（先写临时文件再替换，避免中途崩溃导致文件损坏）
+        需要确认配置确实落盘时（如界面上的“保存”）应显式调用，写入失败时抛出异常
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+            errors = []
+            for filepath, data in pending.items():
+                try:
+                    self._write_atomic(filepath, data)
+                except Exception as e:
+                    # 写入失败的配置保留在内存中，下次写盘时重试
+                    self._pending.setdefault(filepath, data)
+                    errors.append(f"{os.path.basename(filepath)}: {e}")
+            if errors:
+                self.last_flush_error = Exception(f"保存配置文件失败: {'; '.join(errors)}")
+                raise self.last_flush_error
+            self.last_flush_error = None
+
+    def _flush_in_background(self):
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.flush()
         except Exception as e:
-            raise Exception(f"保存配置文件失败: {str(e)}")
\ No newline at end of file
+            if self.error_callback is not None:
+                self.error_callback(e)
+            else:
+                print(str(e))
+
+    def _write_atomic(self, filepath: str, data: Any):
+        write_atomic(filepath, lambda f: json.dump(data, f, ensure_ascii=False, indent=2), fsync=True)
+        stat = os.stat(filepath)
+        self._cache[filepath] = ((stat.st_mtime_ns, stat.st_size), data)
@@ -0,0 +1,179 @@
+# core/content_hash.py
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .dir_scan import DirEntryInfo
+from .json_store import JsonStore
+from .task_runner import check_cancelled
+
+try:  # 可选依赖：安装 xxhash 后可使用更快的 xxh3
+    import xxhash
+except ImportError:
+    xxhash = None
+
+ALGORITHM_BLAKE2B = 'blake2b'
+ALGORITHM_XXHASH = 'xxhash'
+# 每次读取的块大小
+CHUNK_SIZE = 1024 * 1024
+# 哈希缓存最多保留的文件数，超出时丢弃最早写入的记录
+MAX_CACHE_ENTRIES = 50000
+
+
+def available_algorithms() -> List[str]:
+    """当前环境可用的哈希算法"""
+    return [ALGORITHM_XXHASH, ALGORITHM_BLAKE2B] if xxhash is not None else [ALGORITHM_BLAKE2B]
+
+
+def default_algorithm() -> str:
+    """优先使用 xxhash，未安装时使用标准库的 blake2b"""
+    return available_algorithms()[0]
+
+
+def _new_hasher(algorithm: str):
+    if algorithm == ALGORITHM_BLAKE2B:
+        return hashlib.blake2b(digest_size=16)
+    if algorithm == ALGORITHM_XXHASH:
+        if xxhash is None:
+            raise ValueError("使用 xxhash 需要安装 xxhash（pip install xxhash），或改用 blake2b")
+        return xxhash.xxh3_128()
+    raise ValueError(f"不支持的哈希算法：{algorithm}")
+
+
+def hash_file(path: str, algorithm: str = ALGORITHM_BLAKE2B, chunk_size: int = CHUNK_SIZE) -> str:
+    """分块读取文件计算内容哈希（复用同一块缓冲区，不整体读入内存）"""
+    hasher = _new_hasher(algorithm)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            hasher.update(view[:size])
+    return hasher.hexdigest()
+
+
+class HashCache(JsonStore):
+    """
+    内容哈希缓存（持久化为 config/cache/content_hashes.json）
+    按 路径 + 修改时间 + 大小 + 算法 复用上次的结果，文件未变化时不再读取内容。
+    """
+
+    def get(self, path: str, mtime: float, size: int, algorithm: str) -> Optional[str]:
+        with self._lock:
+            record = self._load().get(os.path.abspath(path))
+        if record and record[:3] == [mtime, size, algorithm]:
+            return record[3]
+        return None
+
+    def set(self, path: str, mtime: float, size: int, algorithm: str, digest: str):
+        with self._lock:
+            data = self._load()
+            key = os.path.abspath(path)
+            data.pop(key, None)
+            data[key] = [mtime, size, algorithm, digest]
+            if len(data) > MAX_CACHE_ENTRIES:
+                for old_key in list(data)[:len(data) - MAX_CACHE_ENTRIES]:
+                    del data[old_key]
+            self._mark_dirty()
+
+
+class ContentHasher:
+    """
+    批量计算提交文件的内容哈希
+    未变化的文件直接取缓存，其余文件在线程池中并发读取（读文件和哈希计算都会释放 GIL）。
+    """
+
+    def __init__(self, cache: Optional[HashCache] = None, max_workers: int = 4):
+        self.cache = cache
+        self.max_workers = max_workers
+
+    def hash_entries(self, entries: Iterable[Tuple[str, DirEntryInfo]], algorithm: Optional[str] = None,
+                     cancel_event: Optional[threading.Event] = None,
+                     log_callback: Optional[Callable] = None) -> Dict[str, str]:
+        """
+        :param entries: (键, 目录条目) 对；键通常为相对作业文件夹的路径，文件夹条目会被跳过
+        :return: 键 → 内容哈希（读取失败的文件不在结果中）
+        """
+        algorithm = algorithm or default_algorithm()
+        _new_hasher(algorithm)  # 算法不可用时立即报错
+
+        digests: Dict[str, str] = {}
+        pending: List[Tuple[str, DirEntryInfo]] = []
+        for key, entry in entries:
+            if entry.is_dir:
+                continue
+            digest = self.cache.get(entry.path, entry.mtime, entry.size, algorithm) if self.cache else None
+            if digest is None:
+                pending.append((key, entry))
+            else:
+                digests[key] = digest
+
+        def work(item: Tuple[str, DirEntryInfo]):
+            key, entry = item
+            check_cancelled(cancel_event)
+            try:
+                return key, entry, hash_file(entry.path, algorithm)
+            except OSError as e:
+                if log_callback:
+                    log_callback(f"无法读取文件内容：{key}（{e}）")
+                return key, entry, None
+
+        def store(results):
+            for key, entry, digest in results:
+                if digest is None:
+                    continue
+                digests[key] = digest
+                if self.cache:
+                    self.cache.set(entry.path, entry.mtime, entry.size, algorithm, digest)
+
+        if len(pending) <= 1 or self.max_workers <= 1:
+            store(map(work, pending))
+        else:
+            executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending)),
+                                          thread_name_prefix="content-hash")
+            try:
+                store(executor.map(work, pending))
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        if self.cache:
+            try:
+                self.cache.save()
+            except OSError as e:
+                # 缓存只是加速手段，写不进去不影响本次结果
+                if log_callback:
+                    log_callback(f"⚠ 无法保存内容哈希缓存（{e}），下次将重新计算")
+        return digests
+
+
+def find_identical(files_by_student: Dict[str, List[str]], digests: Dict[str, str]):
+    """
+    按内容哈希分组
+    :return: (同一学生内完全相同的文件组 {学生: [[文件, ...], ...]},
+              不同学生之间内容相同的文件组 [(哈希, [(学生, 文件), ...]), ...])
+    """
+    groups: Dict[str, List[tuple]] = {}
+    for student, files in files_by_student.items():
+        for name in files:
+            digest = digests.get(name)
+            if digest is not None:
+                groups.setdefault(digest, []).append((student, name))
+
+    within: Dict[str, List[List[str]]] = {}
+    across = []
+    for digest, members in groups.items():
+        if len(members) < 2:
+            continue
+        by_student: Dict[str, List[str]] = {}
+        for student, name in members:
+            by_student.setdefault(student, []).append(name)
+        for student, names in by_student.items():
+            if len(names) > 1:
+                within.setdefault(student, []).append(names)
+        if len(by_student) > 1:
+            across.append((digest, members))
+    return within, across
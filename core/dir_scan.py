@@ -0,0 +1,124 @@
+# core/dir_scan.py
+import os
+from typing import Dict, Iterator, List, Optional
+
+from .instrumentation import NULL_INSTRUMENTATION, STAGE_LISTING, NullInstrumentation
+
+
+class DirEntryInfo:
+    """
+    目录条目信息（基于 os.DirEntry）
+    类型信息来自 scandir 本身，无需额外 stat；大小和修改时间在首次访问时才 stat 并缓存。
+    """
+
+    __slots__ = ('name', 'path', 'is_dir', '_entry', '_stat')
+
+    def __init__(self, entry: os.DirEntry):
+        self.name = entry.name
+        self.path = entry.path
+        try:
+            self.is_dir = entry.is_dir()
+        except OSError:
+            self.is_dir = False
+        self._entry = entry
+        self._stat = None
+
+    def _get_stat(self) -> Optional[os.stat_result]:
+        if self._stat is None:
+            try:
+                self._stat = self._entry.stat()
+            except OSError:
+                return None
+        return self._stat
+
+    @property
+    def size(self) -> int:
+        stat = self._get_stat()
+        return stat.st_size if stat else 0
+
+    @property
+    def mtime(self) -> float:
+        stat = self._get_stat()
+        return stat.st_mtime if stat else 0.0
+
+    @property
+    def inode(self) -> int:
+        """索引节点号（POSIX 上来自 scandir，无需 stat）"""
+        try:
+            return self._entry.inode()
+        except OSError:
+            return 0
+
+    @property
+    def is_temp_file(self) -> bool:
+        """Office 临时文件（~$ 开头）"""
+        return self.name.startswith('~$')
+
+    def __repr__(self) -> str:
+        return f"DirEntryInfo({self.name!r}, is_dir={self.is_dir})"
+
+
+class DirSnapshot:
+    """
+    目录快照：一次 scandir 得到的全部条目
+    同一次运行中可在收集、匹配、重命名等环节反复使用，不必重复列目录。
+    """
+
+    def __init__(self, path: str, entries: List[DirEntryInfo], exists: bool = True):
+        self.path = path
+        self.entries = entries
+        self.exists = exists
+        self._by_name: Dict[str, DirEntryInfo] = {entry.name: entry for entry in entries}
+
+    def __iter__(self) -> Iterator[DirEntryInfo]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def get(self, name: str) -> Optional[DirEntryInfo]:
+        return self._by_name.get(name)
+
+    @property
+    def names(self) -> List[str]:
+        return [entry.name for entry in self.entries]
+
+    def files(self, include_temp: bool = False) -> List[DirEntryInfo]:
+        """普通文件（默认排除 ~$ 临时文件）"""
+        return [entry for entry in self.entries
+                if not entry.is_dir and (include_temp or not entry.is_temp_file)]
+
+    def dirs(self, include_hidden: bool = True) -> List[DirEntryInfo]:
+        """子文件夹（include_hidden=False 时排除 . 开头的文件夹）"""
+        return [entry for entry in self.entries
+                if entry.is_dir and (include_hidden or not entry.name.startswith('.'))]
+
+
+def scan_dir(path: str, missing_ok: bool = False,
+             instrumentation: Optional[NullInstrumentation] = None) -> DirSnapshot:
+    """
+    使用 os.scandir 列出目录
+    所有列目录都经过这里，耗时计入“列目录”阶段，并计数 syscalls.scandir 与 files.listed。
+    :param missing_ok: 目录不存在时返回空快照（exists=False）而不是抛出异常
+    :param instrumentation: 分阶段计时与计数（None 为关闭）
+    """
+    instrumentation = instrumentation or NULL_INSTRUMENTATION
+    instrumentation.count('syscalls.scandir')
+    with instrumentation.stage(STAGE_LISTING):
+        try:
+            with os.scandir(path) as iterator:
+                entries = [DirEntryInfo(entry) for entry in iterator]
+        except FileNotFoundError:
+            if not missing_ok:
+                raise
+            return DirSnapshot(path, [], exists=False)
+    instrumentation.count('files.listed', len(entries))
+    return DirSnapshot(path, entries)
+
+
+def list_subfolders(parent_dir: str) -> List[str]:
+    """列出母文件夹下的子文件夹名称（排除 . 开头的系统文件夹）"""
+    return [entry.name for entry in scan_dir(parent_dir).dirs(include_hidden=False)]
@@ -1,144 +1,285 @@
 # 文件路径: core/file_renamer.py
 import os
-import pandas as pd
-from typing import Dict, Optional, Callable
+import threading
+from typing import List, Optional, Callable, Sequence
+from .dir_scan import DirSnapshot, scan_dir
+from .instrumentation import NULL_INSTRUMENTATION, STAGE_RENAME, NullInstrumentation
+from .name_template import CompiledTemplate, compile_template
+from .rename_journal import JOURNAL_DIR, KIND_RENAME, KIND_UNDO, JournalOp, RenameJournal
+from .rename_plan import STATUS_EXISTS, PlanEntry, RenamePlan
+from .roster_index import RosterIndex
+from .submission_scan import MatchRecord, scan_submissions
+from .task_runner import TaskCancelled, check_cancelled
 
 class FileRenamer:
-    def rename_files(self, df: pd.DataFrame, homework_dir: str,
-                    rename_format: dict, log_callback: Optional[Callable] = None) -> int:
+    def __init__(self, use_journal: bool = True, instrumentation: Optional[NullInstrumentation] = None,
+                 journal_dir: str = JOURNAL_DIR):
+        """
+        :param use_journal: 是否把每次改名写入重命名日志（用于撤销和续做）
+        :param instrumentation: 分阶段计时与计数（None 为关闭）
+        :param journal_dir: 重命名日志所在目录（每个作业文件夹一个日志文件）
+        """
+        self.use_journal = use_journal
+        self.journal_dir = journal_dir
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+
+    def rename_files(self, roster: RosterIndex, homework_dir: str,
+                    rename_format: dict, log_callback: Optional[Callable] = None,
+                    cancel_event: Optional[threading.Event] = None,
+                    records: Optional[List[MatchRecord]] = None) -> int:
         """
         根据格式重命名文件
+        执行前总会重新列一次目录（一次 scandir，不逐个 stat）做冲突分析：调用方的匹配记录可能是在
+        写报告、计算哈希之前得到的，这期间新上传的同名文件必须算作“目标已存在”，
+        否则 POSIX 上的 os.rename 会直接覆盖它。
+        :param roster: 花名册索引（匹配器与学生变量均从中获取）
+        :param cancel_event: 取消标记，被设置后在处理下一个条目前抛出 TaskCancelled
+        :param records: 本次运行已得到的匹配记录（None则现场匹配；已不在目录中的条目会被忽略）
         """
-        rename_count = 0
+        with self.instrumentation.stage(STAGE_RENAME):
+            resumed = self.resume(homework_dir, log_callback, cancel_event)
+            if resumed is not None:
+                # 续做改变了目录内容，匹配记录需要重新获取
+                records = None
 
-        if not os.path.exists(homework_dir):
-            self._log(f"跳过不存在的文件夹：{homework_dir}", log_callback)
-            return rename_count
+            snapshot = scan_dir(homework_dir, True, self.instrumentation)
+            if records is not None:
+                records = [record for record in records if record.name in snapshot]
+            plan = self.preview(roster, homework_dir, rename_format, cancel_event, snapshot, records)
+            if plan is None:
+                self._log(f"跳过不存在的文件夹：{homework_dir}", log_callback)
+                return resumed or 0
+            return (resumed or 0) + self.apply_plan(plan, log_callback, cancel_event)
 
-        # 创建映射
-        name_to_id = {row['姓名']: str(row['学号']) for _, row in df.iterrows()}
-        id_to_name = {str(row['学号']): row['姓名'] for _, row in df.iterrows()}
+    def preview(self, roster: RosterIndex, homework_dir: str, rename_format: dict,
+                cancel_event: Optional[threading.Event] = None,
+                snapshot: Optional[DirSnapshot] = None,
+                records: Optional[List[MatchRecord]] = None) -> Optional[RenamePlan]:
+        """
+        预演重命名：只读目录一次，返回已完成冲突分析的计划（不改动磁盘）
+        有因崩溃而中断的运行时，计划的 pending_steps 记录执行前会先续做的步骤数。
+        文件夹不存在时返回 None
+        """
+        if snapshot is None:
+            snapshot = scan_dir(homework_dir, True, self.instrumentation)
+        if not snapshot.exists:
+            return None
+        if records is None:
+            records = scan_submissions(snapshot, roster.matcher,
+                                       rename_format.get('is_folder', False), cancel_event)
+        plan = self.build_plan(records, roster, rename_format, homework_dir, snapshot)
+        if self.use_journal:
+            pending = RenameJournal(homework_dir, self.journal_dir).pending_run()
+            if pending is not None:
+                plan.pending_steps = len(pending.remaining)
+        return plan
 
-        template = rename_format.get('template', '')
-        is_folder_project = rename_format.get('is_folder', False)
+    def compile_format(self, rename_format: dict, roster: RosterIndex) -> CompiledTemplate:
+        """编译重命名格式（模板中出现花名册没有的变量时抛出 TemplateError）"""
+        return compile_template(rename_format.get('template', ''), roster.columns)
 
-        if is_folder_project:
-            rename_count = self._rename_folders(homework_dir, df, name_to_id, id_to_name, template, log_callback)
-        else:
-            rename_count = self._rename_files(homework_dir, df, name_to_id, id_to_name, template, log_callback)
+    def build_plan(self, records: List[MatchRecord], roster: RosterIndex,
+                   rename_format: dict, homework_dir: str,
+                   snapshot: Optional[DirSnapshot] = None) -> RenamePlan:
+        """
+        生成重命名计划表
+        先按模板把整个花名册渲染一次（每个学生一个目标名称，随花名册索引缓存），
+        再按学生逐条查表；文件保留原始扩展名。
+        :param snapshot: 目录快照，提供现有名称用于冲突检测（None则只在计划内部检测）
+        """
+        existing_names = snapshot.names if snapshot is not None else None
+        if not records:
+            return RenamePlan(homework_dir, [], existing_names)
+        inodes = {record.name: record.entry.inode for record in records}
 
-        return rename_count
+        targets = roster.render_names(self.compile_format(rename_format, roster))
+        keep_extension = not rename_format.get('is_folder', False)
 
-    def _rename_folders(self, homework_dir: str, df: pd.DataFrame, name_to_id: Dict[str, str],
-                       id_to_name: Dict[str, str], template: str,
-                       log_callback: Optional[Callable]) -> int:
-        """重命名文件夹"""
-        rename_count = 0
+        entries = []
+        for record in records:
+            target = targets[record.student]
+            if keep_extension:
+                # 附加原始文件的扩展名
+                target += os.path.splitext(record.name)[1]
+            entries.append(PlanEntry(record.name, target, record.student, record.entry.is_dir))
+        return RenamePlan(homework_dir, entries, existing_names, inodes)
+
+    def apply_plan(self, plan: RenamePlan, log_callback: Optional[Callable] = None,
+                   cancel_event: Optional[threading.Event] = None) -> int:
+        """
+        按预演结果执行重命名
+        冲突条目在执行前统一记录并跳过；循环改名通过临时名称完成，执行时不再逐个检查目标是否存在。
+        """
+        for entry, status in plan.conflicts:
+            reason = "目标已存在" if status == STATUS_EXISTS else "与其他条目目标重复"
+            self._log(f"跳过重命名（{reason}）: {entry.source} -> {entry.target}", log_callback)
 
-        for item in os.listdir(homework_dir):
-            item_path = os.path.join(homework_dir, item)
-            if os.path.isdir(item_path):
-                matched_name = self._find_matched_student(item, name_to_id, id_to_name)
-                if matched_name:
-                    # 获取学生完整信息
-                    student_info = df[df['姓名'] == matched_name].iloc[0]
-                    new_name = self._generate_new_name(template, student_info, "", is_folder=True)
-                    new_path = os.path.join(homework_dir, new_name)
-                    if not os.path.exists(new_path):
-                        os.rename(item_path, new_path)
-                        rename_count += 1
-                        self._log(f"重命名文件夹: {item} -> {new_name}", log_callback)
+        operations = [JournalOp(source, target, entry.source, entry.target, entry.is_dir)
+                      for source, target, entry in plan.operations()]
+        if not operations:
+            return 0
 
-        return rename_count
+        journal = self._open_journal(plan.homework_dir, log_callback)
+        if journal is not None:
+            journal.begin(operations, KIND_RENAME)
+        try:
+            return self._run_operations(plan.homework_dir, operations, range(len(operations)), journal,
+                                        log_callback, cancel_event, inodes=plan.inodes)
+        finally:
+            if journal is not None:
+                journal.close()
 
-    def _rename_files(self, homework_dir: str, df: pd.DataFrame, name_to_id: Dict[str, str],
-                     id_to_name: Dict[str, str], template: str,
-                     log_callback: Optional[Callable]) -> int:
-        """重命名文件【已修复：保留并附加原始文件扩展名】"""
+    def resume(self, homework_dir: str, log_callback: Optional[Callable] = None,
+               cancel_event: Optional[threading.Event] = None) -> Optional[int]:
+        """
+        续做上次因崩溃而中断的重命名（或撤销）；被用户取消的运行不会续做
+        :return: 续做完成的改名数量；没有中断的运行时返回 None
+        """
+        if not self.use_journal:
+            return None
+        # 先只读检查有无中断的运行，确有需要续做时才打开日志写入
+        run = RenameJournal(homework_dir, self.journal_dir).pending_run()
+        if run is None:
+            return None
+        journal = self._open_journal(homework_dir, log_callback)
+        if journal is None:
+            return None
+
+        action = "撤销" if run.kind == KIND_UNDO else "重命名"
+        self._log(f"检测到上次未完成的{action}（{run.time}），继续执行剩余 {len(run.remaining)} 步...", log_callback)
+        journal.attach(run)
+        try:
+            return self._run_operations(homework_dir, run.operations, run.remaining, journal,
+                                        log_callback, cancel_event, verify=True)
+        finally:
+            journal.close()
+
+    def undo_last(self, homework_dir: str, log_callback: Optional[Callable] = None,
+                  cancel_event: Optional[threading.Event] = None) -> int:
+        """
+        撤销最近一次重命名：按日志倒序把已完成的每一步改回去
+        :return: 恢复原名的条目数量
+        """
+        journal = self._open_journal(homework_dir, log_callback)
+        if journal is None:
+            raise ValueError("重命名日志不可用，无法撤销")
+
+        with journal:
+            pending = journal.pending_run()
+            if pending is not None and pending.kind == KIND_UNDO:
+                # 上次撤销被中断：先把它做完
+                journal.close()
+                return self.resume(homework_dir, log_callback, cancel_event) or 0
+
+            run = journal.last_undoable_run()
+            if run is None:
+                raise ValueError("没有可撤销的重命名记录")
+
+            # 每一步反向执行：条目的“原名称/最终名称”随之互换
+            operations = [JournalOp(op.target, op.source, op.final, op.original, op.is_dir)
+                          for op in reversed(run.done_operations())]
+            self._log(f"撤销 {run.time} 的重命名（共 {len(operations)} 步）...", log_callback)
+            journal.begin(operations, KIND_UNDO, reverts=run.run_id)
+            return self._run_operations(homework_dir, operations, range(len(operations)), journal,
+                                        log_callback, cancel_event, verify=True)
+
+    def _run_operations(self, homework_dir: str, operations: Sequence[JournalOp], indices,
+                        journal: Optional[RenameJournal], log_callback: Optional[Callable],
+                        cancel_event: Optional[threading.Event], verify: bool = False,
+                        inodes: Optional[dict] = None) -> int:
+        """
+        执行改名步骤并写入日志
+        :param verify: 执行前核对磁盘状态（续做/撤销时使用）：源已不在而目标已在视为已完成，
+                       目标被其他文件占用则跳过
+        """
         rename_count = 0
+        blocked = set()     # 因改名失败而仍被占用的名称（normcase）
+        in_temp = set()     # 当前停留在临时名称上的条目（以原名称标识）
+        try:
+            for index in indices:
+                operation = operations[index]
+                source, target = operation.source, operation.target
+                if source == operation.original and not in_temp:
+                    # 有条目停留在临时名称时不响应取消，保证循环完整结束
+                    check_cancelled(cancel_event)
+
+                source_path = os.path.join(homework_dir, source)
+                target_path = os.path.join(homework_dir, target)
+                reason = None
+                if os.path.normcase(target) in blocked:
+                    reason = "目标未能腾出"
+                elif verify and os.path.lexists(target_path) and not self._same_entry(source_path, target_path):
+                    if os.path.lexists(source_path):
+                        reason = "目标已存在"
+                    else:
+                        # 上次已改名，但日志记录在 fsync 之前丢失
+                        self._finish_step(index, operation, journal, 0, in_temp)
+                        if target == operation.final:
+                            rename_count += 1
+                        continue
+
+                if reason is None:
+                    try:
+                        self.instrumentation.count('syscalls.rename')
+                        os.rename(source_path, target_path)
+                    except OSError as e:
+                        reason = f"重命名失败: {e}"
 
-        for filename in os.listdir(homework_dir):
-            filepath = os.path.join(homework_dir, filename)
-            if filename.startswith('~$') or os.path.isdir(filepath):
-                continue
-
-            # ========== 关键修复开始 ==========
-            # 1. 首先，分离原始文件的名称和扩展名[citation:3]
-            original_name_without_ext, original_extension = os.path.splitext(filename)
-            # ========== 关键修复结束 ==========
-
-            matched_name = self._find_matched_student(original_name_without_ext, name_to_id, id_to_name)
-
-            if matched_name:
-                # 获取学生完整信息
-                student_info = df[df['姓名'] == matched_name].iloc[0]
-                # 2. 生成新文件名的主体部分（不包含扩展名）
-                new_name_base = self._generate_new_name(template, student_info, "")
-                # 3. 将原始文件的扩展名附加到新文件名上[citation:8]
-                new_name = new_name_base + original_extension
-
-                new_path = os.path.join(homework_dir, new_name)
-                if not os.path.exists(new_path):
-                    os.rename(filepath, new_path)
+                if reason is not None:
+                    blocked.add(os.path.normcase(source))
+                    in_temp.discard(operation.original)
+                    if journal is not None:
+                        journal.skip(index, reason)
+                    self._log(f"跳过重命名（{reason}）: {source} -> {target}", log_callback)
+                    continue
+
+                inode = (inodes or {}).get(operation.original, 0)
+                self._finish_step(index, operation, journal, inode, in_temp)
+                if target == operation.final:
                     rename_count += 1
-                    self._log(f"重命名文件: {filename} -> {new_name}", log_callback)
+                    kind = "文件夹" if operation.is_dir else "文件"
+                    self._log(f"重命名{kind}: {operation.original} -> {operation.final}", log_callback)
+        except TaskCancelled:
+            # 用户取消：记录 abort，剩余步骤作废、不会被自动续做（已完成的步骤仍可撤销）
+            if journal is not None:
+                journal.abort(rename_count)
+            self.instrumentation.count('files.renamed', rename_count)
+            raise
 
+        if journal is not None:
+            journal.commit(rename_count)
+        self.instrumentation.count('files.renamed', rename_count)
         return rename_count
 
-    def _find_matched_student(self, search_text: str, name_to_id: Dict[str, str],
-                            id_to_name: Dict[str, str]) -> Optional[str]:
-        """查找匹配的学生"""
-        # 先匹配姓名
-        for name in name_to_id.keys():
-            if name in search_text:
-                return name
-
-        # 再匹配学号
-        for student_id, name in id_to_name.items():
-            if student_id in search_text:
-                return name
-
-        return None
-
-    def _generate_new_name(self, template: str, student_info: pd.Series,
-                          file_ext: str, is_folder: bool = False) -> str:
-        """生成新文件名（基础部分）"""
-        # 这里可以添加课程名称和项目名称的提取逻辑
-        course_name = "区块链2301"  # 可以从配置中获取
-        project_name = "PROJECT"   # 可以从文件夹名称提取
-
-        new_name = template
-
-        # 替换标准变量
-        new_name = new_name.replace('{学号}', self._safe_get_value(student_info, '学号'))
-        new_name = new_name.replace('{姓名}', self._safe_get_value(student_info, '姓名'))
-        new_name = new_name.replace('{课程名称}', course_name)
-        new_name = new_name.replace('{项目名称}', project_name)
-
-        # 替换自定义变量（花名册中的其他列）
-        for column in student_info.index:
-            if column not in ['学号', '姓名']:  # 避免重复替换
-                variable = "{" + column + "}"
-                if variable in new_name:
-                    value = self._safe_get_value(student_info, column)
-                    new_name = new_name.replace(variable, value)
-
-        # 注意：这里不再自动添加 {扩展名}，因为扩展名会在外部处理
-        # 如果模板中用户写了 {扩展名}，则替换为空字符串，防止出现多余内容
-        if '{扩展名}' in new_name:
-            new_name = new_name.replace('{扩展名}', '')
-
-        return new_name
-
-    def _safe_get_value(self, student_info: pd.Series, column: str) -> str:
-        """安全获取值，处理NaN和空值"""
-        value = student_info[column]
-
-        # 检查是否为NaN或空值
-        if pd.isna(value) or value == '' or str(value).strip() == 'nan':
-            return '_'  # 用下划线代替空值
-
-        return str(value).strip()
+    @staticmethod
+    def _finish_step(index: int, operation: JournalOp, journal: Optional[RenameJournal],
+                     inode: int, in_temp: set):
+        if journal is not None:
+            journal.record(index, operation, inode)
+        if operation.target == operation.final:
+            in_temp.discard(operation.original)
+        else:
+            in_temp.add(operation.original)
+
+    @staticmethod
+    def _same_entry(source_path: str, target_path: str) -> bool:
+        """两个路径是否指向同一条目（不区分大小写的文件系统上仅大小写不同的改名）"""
+        try:
+            return os.path.samefile(source_path, target_path)
+        except OSError:
+            return False
+
+    def _open_journal(self, homework_dir: str, log_callback: Optional[Callable]) -> Optional[RenameJournal]:
+        """打开作业文件夹的重命名日志；未启用或无法写入时返回 None（改名照常进行，只是不能撤销和续做）"""
+        if not self.use_journal:
+            return None
+        journal = RenameJournal(homework_dir, self.journal_dir)
+        try:
+            journal.open()
+        except OSError as e:
+            self._log(f"⚠ 无法写入重命名日志（{e}），本次不记录日志", log_callback)
+            return None
+        return journal
 
     def _log(self, message: str, log_callback: Optional[Callable]):
         """记录日志"""
@@ -0,0 +1,174 @@
+# core/instrumentation.py
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# 各阶段名称（汇总时按此顺序列出，其余阶段排在后面）
+STAGE_ROSTER_LOAD = 'roster_load'
+STAGE_LISTING = 'listing'
+STAGE_MATCHING = 'matching'
+STAGE_CONTENT_HASH = 'content_hash'
+STAGE_RENAME = 'rename'
+STAGE_REPORT_WRITE = 'report_write'
+STAGE_ORDER = (STAGE_ROSTER_LOAD, STAGE_LISTING, STAGE_MATCHING, STAGE_CONTENT_HASH,
+               STAGE_RENAME, STAGE_REPORT_WRITE)
+
+# 汇总中显示的阶段名称
+STAGE_LABELS = {
+    STAGE_ROSTER_LOAD: '读取花名册',
+    STAGE_LISTING: '列目录',
+    STAGE_MATCHING: '匹配',
+    STAGE_CONTENT_HASH: '内容哈希',
+    STAGE_RENAME: '重命名',
+    STAGE_REPORT_WRITE: '写报告',
+}
+
+
+class _NullStage:
+    """未启用统计时的阶段计时器：什么都不做"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullInstrumentation:
+    """
+    未启用统计时使用的空实现
+    处理器和重命名器始终调用同一套接口，禁用时每次调用只是一次空方法调用，不计时也不加锁。
+    """
+
+    enabled = False
+
+    def stage(self, name: str):
+        return _NULL_STAGE
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def summary(self) -> Dict[str, Any]:
+        return {}
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+class _Stage:
+    __slots__ = ('_owner', '_name', '_start')
+
+    def __init__(self, owner: 'Instrumentation', name: str):
+        self._owner = owner
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._owner._add_span(self._name, self._start, time.perf_counter())
+        return False
+
+
+class Instrumentation(NullInstrumentation):
+    """
+    一次运行的分阶段计时与计数
+    各阶段可以嵌套，也可以在多个线程中同时进行（批量检查并发扫描时各线程的耗时分别记录），
+    因此汇总中各阶段耗时之和可能大于总耗时。
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._finished: Optional[float] = None
+        self._lock = threading.Lock()
+        self.spans: List[tuple] = []  # (阶段, 开始, 结束, 线程号)，时间相对于创建时刻（秒）
+        self.counters: Dict[str, int] = {}
+
+    def stage(self, name: str) -> _Stage:
+        """计时上下文：with instrumentation.stage('listing'): ..."""
+        return _Stage(self, name)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self):
+        """结束计时（总耗时以此为准；不调用时以生成汇总的时刻为准）"""
+        self._finished = time.perf_counter()
+
+    def _add_span(self, name: str, start: float, end: float):
+        with self._lock:
+            self.spans.append((name, start - self._origin, end - self._origin, threading.get_ident()))
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        :return: {'wall_ms': 总耗时, 'stages': {阶段: {'calls', 'total_ms', 'max_ms'}}, 'counters': {...}}
+        """
+        end = self._finished if self._finished is not None else time.perf_counter()
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+
+        stages: Dict[str, Dict[str, float]] = {}
+        for name, start, finish, _ in spans:
+            duration = (finish - start) * 1000
+            stage = stages.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stage['calls'] += 1
+            stage['total_ms'] += duration
+            stage['max_ms'] = max(stage['max_ms'], duration)
+
+        ordered = [name for name in STAGE_ORDER if name in stages] + \
+                  sorted(name for name in stages if name not in STAGE_ORDER)
+        return {
+            'wall_ms': round((end - self._origin) * 1000, 3),
+            'stages': {name: {key: round(value, 3) for key, value in stages[name].items()} for name in ordered},
+            'counters': dict(sorted(counters.items())),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), ensure_ascii=False, indent=2)
+
+    def format_summary(self) -> List[str]:
+        """汇总的文字版本（逐行，供日志显示）"""
+        summary = self.summary()
+        lines = [f"⏱ 耗时统计（总计 {summary['wall_ms'] / 1000:.2f} 秒）:"]
+        for name, stage in summary['stages'].items():
+            calls = f"，{stage['calls']} 次" if stage['calls'] > 1 else ''
+            lines.append(f"  {STAGE_LABELS.get(name, name)}: {stage['total_ms'] / 1000:.3f} 秒{calls}")
+        if summary['counters']:
+            lines.append("  计数: " + ', '.join(f"{name}={value}" for name, value in summary['counters'].items()))
+        return lines
+
+    def write_chrome_trace(self, path: str) -> str:
+        """
+        写出 Chrome 跟踪文件（chrome://tracing 或 https://ui.perfetto.dev 打开）
+        每个阶段是一个完整事件，计数在结束时刻记录为计数器事件。
+        """
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        pid = os.getpid()
+        events = [{'name': name, 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': round(start * 1e6, 3), 'dur': round((end - start) * 1e6, 3)}
+                  for name, start, end, tid in spans]
+        if counters:
+            last = max((end for _, _, end, _ in spans), default=0.0)
+            events.append({'name': 'counters', 'ph': 'C', 'pid': pid, 'tid': 0,
+                           'ts': round(last * 1e6, 3), 'args': counters})
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return path
@@ -0,0 +1,74 @@
+# core/json_store.py
+import hashlib
+import json
+import os
+import threading
+from typing import IO, Any, Callable, Dict, Optional
+
+
+def write_atomic(path: str, write: Callable[[IO], None], binary: bool = False, fsync: bool = False):
+    """
+    原子写入文件：先写入同目录的临时文件，再用 os.replace 替换，中途崩溃也不会留下写了一半的文件
+    :param write: 接收已打开的临时文件并写入内容
+    :param binary: 以二进制方式打开（否则为 UTF-8 文本）
+    :param fsync: 替换前把内容刷到磁盘
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    try:
+        with (open(tmp_path, 'wb') if binary else open(tmp_path, 'w', encoding='utf-8')) as f:
+            write(f)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def folder_key(folder: str) -> str:
+    """按文件夹绝对路径的摘要生成键（增量扫描索引的记录、重命名日志的文件名共用）"""
+    path = os.path.abspath(folder)
+    return "folder_" + hashlib.md5(path.encode('utf-8')).hexdigest()[:12]
+
+
+class JsonStore:
+    """
+    持久化为单个 JSON 文件的字典
+    首次访问时才读取文件（文件不存在或损坏时视为空），修改后标记为待保存，save 时原子写回。
+    子类在持有 _lock 时通过 _load() 访问数据，修改后调用 _mark_dirty()。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data: Optional[Dict[str, Any]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._data = data if isinstance(data, dict) else {}
+            except Exception:
+                self._data = {}
+        return self._data
+
+    def _mark_dirty(self):
+        self._dirty = True
+
+    def save(self):
+        """写回磁盘（没有修改时不写）；写入失败时抛出 OSError，数据仍保留在内存中等待下次保存"""
+        with self._lock:
+            if not self._dirty or self._data is None:
+                return
+            data = self._data
+            write_atomic(self.path, lambda f: json.dump(data, f, ensure_ascii=False))
+            self._dirty = False
@@ -0,0 +1,81 @@
+# core/name_template.py
+import re
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+# 内置变量：课程名称、项目名称为固定值（可以从配置中获取）
+BUILTIN_VALUES = {
+    '课程名称': "区块链2301",
+    '项目名称': "PROJECT",
+}
+# 扩展名由重命名器在外部附加，模板中的 {扩展名} 渲染为空字符串
+EXTENSION_VAR = '扩展名'
+
+_VARIABLE_PATTERN = re.compile(r'\{([^{}]+)\}')
+
+
+class TemplateError(ValueError):
+    """模板错误（包含未知变量等）"""
+
+
+class CompiledTemplate:
+    """
+    编译后的命名模板
+    由字面量片段和变量槽组成，渲染时只需按顺序拼接，不再对整个字符串反复 replace。
+    """
+
+    __slots__ = ('template', 'segments', 'variables')
+
+    def __init__(self, template: str, segments: List[Tuple[bool, str]]):
+        self.template = template
+        # (是否变量, 字面量或列名)
+        self.segments: Tuple[Tuple[bool, str], ...] = tuple(segments)
+        self.variables: Tuple[str, ...] = tuple(text for is_var, text in segments if is_var)
+
+    def __repr__(self) -> str:
+        return f"CompiledTemplate({self.template!r})"
+
+
+def compile_template(template: str, available_vars: Iterable[str]) -> CompiledTemplate:
+    """
+    编译模板
+    :param available_vars: 可用变量（通常是花名册的列名）
+    :raises TemplateError: 模板中包含未知变量
+    """
+    return _compile(template, tuple(available_vars))
+
+
+@lru_cache(maxsize=64)
+def _compile(template: str, available_vars: Tuple[str, ...]) -> CompiledTemplate:
+    columns = set(available_vars)
+    segments: List[Tuple[bool, str]] = []
+    unknown = []
+
+    def add_literal(text: str):
+        if not text:
+            return
+        if segments and not segments[-1][0]:
+            segments[-1] = (False, segments[-1][1] + text)
+        else:
+            segments.append((False, text))
+
+    position = 0
+    for match in _VARIABLE_PATTERN.finditer(template):
+        add_literal(template[position:match.start()])
+        position = match.end()
+
+        variable = match.group(1)
+        if variable in BUILTIN_VALUES:
+            add_literal(BUILTIN_VALUES[variable])
+        elif variable in columns:
+            segments.append((True, variable))
+        elif variable == EXTENSION_VAR:
+            continue
+        else:
+            unknown.append(variable)
+    add_literal(template[position:])
+
+    if unknown:
+        names = ', '.join("{" + name + "}" for name in dict.fromkeys(unknown))
+        raise TemplateError(f"模板中包含未知变量：{names}")
+    return CompiledTemplate(template, segments)
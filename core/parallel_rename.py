@@ -0,0 +1,76 @@
+# core/parallel_rename.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .file_renamer import FileRenamer
+from .instrumentation import NullInstrumentation
+from .name_template import compile_template
+from .rename_journal import JOURNAL_DIR
+from .roster_index import RosterIndex
+from .task_runner import TaskCancelled, check_cancelled
+
+
+def rename_folders(parent_dir: str, folders: List[str], roster: RosterIndex, rename_format: dict,
+                   max_workers: int = 1, log_callback: Optional[Callable] = None,
+                   progress_callback: Optional[Callable] = None,
+                   cancel_event: Optional[threading.Event] = None,
+                   journal_dir: str = JOURNAL_DIR,
+                   instrumentation: Optional[NullInstrumentation] = None) -> Dict[str, Optional[int]]:
+    """
+    并发重命名多个子文件夹
+    先构建好花名册索引（含匹配器）并按模板渲染好所有学生的名称，再由线程池按文件夹分配：
+    每个线程负责一个文件夹的扫描、计划与改名。改名的耗时主要在文件系统调用上，线程足以并行，
+    也不必像进程池那样启动进程、传递花名册。
+    :param max_workers: 线程数（1 为逐个重命名）
+    :param progress_callback: 每完成一个文件夹调用一次 (已完成数, 文件夹总数)
+    :param journal_dir: 重命名日志所在目录
+    :param instrumentation: 分阶段计时与计数（各线程的重命名、列目录分别记录）
+    :return: 文件夹 → 重命名数量（失败的文件夹为 None），按 folders 的顺序排列
+    """
+    # 编译模板并预先渲染（结果缓存在花名册索引中，各线程只读共享）
+    roster.render_names(compile_template(rename_format.get('template', ''), roster.columns))
+    roster.ensure_matcher()
+
+    results: Dict[str, Optional[int]] = {}
+    lock = threading.Lock()
+
+    def rename_one(folder: str):
+        def log(message: str):
+            if log_callback:
+                log_callback(f"  [{folder}] {message}")
+
+        try:
+            count = FileRenamer(instrumentation=instrumentation, journal_dir=journal_dir).rename_files(
+                roster, os.path.join(parent_dir, folder), rename_format, log, cancel_event
+            )
+        except TaskCancelled:
+            raise
+        except Exception as e:
+            log(f"重命名失败：{e}")
+            count = None
+        with lock:
+            results[folder] = count
+            done = len(results)
+        if progress_callback:
+            progress_callback(done, len(folders))
+
+    workers = max(1, min(max_workers, len(folders)))
+    if workers == 1:
+        for folder in folders:
+            rename_one(folder)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(rename_one, folder) for folder in folders]
+            try:
+                for future in futures:
+                    future.result()
+            except TaskCancelled:
+                # 其余线程也会在各自的下一次取消检查时停下，尚未开始的文件夹不再处理
+                for future in futures:
+                    future.cancel()
+                raise
+
+    check_cancelled(cancel_event)
+    return {folder: results[folder] for folder in folders if folder in results}
@@ -1,19 +1,79 @@
 # "core/processor.py"
 # core/processor.py
 import os
-import pandas as pd
-from typing import Dict, List, Callable, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Callable, Optional, Sequence
+from .content_hash import ContentHasher, HashCache, find_identical
+from .dir_scan import DirSnapshot, scan_dir
 from .file_renamer import FileRenamer
+from .instrumentation import (NULL_INSTRUMENTATION, STAGE_CONTENT_HASH, STAGE_MATCHING,
+                              STAGE_REPORT_WRITE, STAGE_ROSTER_LOAD, NullInstrumentation)
+from .parallel_rename import rename_folders
+from .rename_plan import RenamePlan
+from .report_sink import ReportTable, get_sink
+from .roster_cache import RosterCache
+from .roster_index import RosterIndex, student_id_text
+from .roster_loader import load_roster_index
+from .scan_index import ScanIndex
+from .student_matcher import StudentMatcher
+from .submission_scan import MatchRecord, discover_submissions, group_by_student, scan_submissions
+from .task_runner import TaskCancelled, check_cancelled
+from .xlsx_writer import fit_width
+
+# numpy 导入较慢，只在批量统计时才导入；花名册由 roster_loader 读取，不依赖 pandas
+
+# 汇总统计中提示“最近连续未交”的次数阈值
+MISSING_STREAK_ALERT = 2
+
 
 class HomeworkProcessor:
-    def __init__(self):
-        self.file_renamer = FileRenamer()
+    def __init__(self, config_dir: str = "config", use_scan_index: bool = False):
+        self.config_dir = config_dir
+        self.file_renamer = FileRenamer(journal_dir=os.path.join(config_dir, "rename_journals"))
+        # 花名册缓存：按路径+修改时间+大小复用解析结果，旁路文件存放在 config/cache
+        self.roster_cache = RosterCache(os.path.join(config_dir, "cache"))
+        # 增量扫描索引（默认关闭，见 set_scan_index）：重复检查同一文件夹时只重新匹配新增或变化的条目
+        self.scan_index: Optional[ScanIndex] = None
+        self.set_scan_index(use_scan_index)
+        # 内容哈希（可选）：按路径+修改时间+大小缓存，未变化的文件不再读取
+        self.content_hasher = ContentHasher(HashCache(os.path.join(config_dir, "cache", "content_hashes.json")))
+        # 分阶段计时与计数（默认关闭，见 set_instrumentation）
+        self.instrumentation: NullInstrumentation = NULL_INSTRUMENTATION
+
+    def set_scan_index(self, enabled: bool):
+        """启用或关闭增量扫描索引（索引文件为 config/scan_index.json，关闭时不读也不写）"""
+        if not enabled:
+            self.scan_index = None
+        elif self.scan_index is None:
+            self.scan_index = ScanIndex(os.path.join(self.config_dir, "scan_index.json"))
+
+    def set_instrumentation(self, instrumentation: Optional[NullInstrumentation] = None):
+        """
+        启用（传入 Instrumentation）或关闭（None）分阶段计时与计数，重命名器同步使用
+        关闭时各统计点只是空方法调用，不影响处理速度。
+        """
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.file_renamer.instrumentation = self.instrumentation
 
     def process_homework(self, roster_path: str, homework_dir: str, output_dir: str, 
-                        rename_format: dict, log_callback: Optional[Callable] = None):
+                        rename_format: dict, log_callback: Optional[Callable] = None,
+                        progress_callback: Optional[Callable] = None,
+                        cancel_event: Optional[threading.Event] = None,
+                        content_hash: bool = False, hash_algorithm: Optional[str] = None,
+                        report_format: Optional[str] = None,
+                        max_depth: int = 0, ignore_globs: Optional[Sequence[str]] = None):
         """
         主处理函数
+        :param progress_callback: 进度回调 (已完成步骤数, 总步骤数)
+        :param cancel_event: 取消标记，被设置后在下一个检查点抛出 TaskCancelled
+        :param content_hash: 是否比对文件内容（标记完全相同的重复提交和不同学生之间的相同文件）
+        :param hash_algorithm: 'xxhash' 或 'blake2b'，None 时自动选择
+        :param report_format: 报告格式 xlsx / csv / parquet / jsonl（None 为 xlsx）
+        :param max_depth: 递归查找提交的子目录层数（0 只看作业文件夹本身；重命名始终只处理第一层）
+        :param ignore_globs: 递归查找时在默认忽略列表之外额外忽略的通配符
         """
+        total_steps = 5
         try:
             project_name = os.path.basename(homework_dir.rstrip(os.sep)).upper()
 
@@ -21,56 +81,139 @@ class HomeworkProcessor:
             self._log(f"处理 {project_name} 项目", log_callback)
             self._log(f"{'='*50}\n", log_callback)
 
-            # 读取花名册
-            df = self._read_roster(roster_path)
-            all_students = set(df['姓名'].tolist())
-            id_to_name = {str(row['学号']): row['姓名'] for _, row in df.iterrows()}
+            # 读取花名册，并先编译重命名模板、检查报告格式（有误时在动任何文件之前报错）
+            get_sink(report_format)
+            roster = self._load_roster(roster_path)
+            self.file_renamer.compile_format(rename_format, roster)
+            self._report_progress(1, total_steps, progress_callback)
+            check_cancelled(cancel_event)
 
             # 检查是否为文件夹项目
             is_folder_project = rename_format.get('is_folder', False)
 
-            # 收集已交作业学生
-            submitted_files = self._collect_submitted_files(
-                homework_dir, all_students, id_to_name, is_folder_project, log_callback
+            # 列出并匹配作业文件夹（只扫描一次，未交名单、重复名单和重命名共用这份匹配记录）
+            snapshot = self._scan_dir(homework_dir)
+            records = self._scan_submissions(
+                homework_dir, roster.matcher, is_folder_project, log_callback, cancel_event, snapshot,
+                max_depth, ignore_globs
             )
 
+            # 收集已交作业学生
+            submitted_files = group_by_student(records)
+            self._report_progress(2, total_steps, progress_callback)
+
             # 处理未交作业名单
-            self._process_missing_students(df, submitted_files, homework_dir, output_dir, log_callback)
+            self.write_missing_students(roster, submitted_files, homework_dir, output_dir, log_callback,
+                                        report_format)
+            self._report_progress(3, total_steps, progress_callback)
 
-            # 处理重复提交名单
-            self._process_repeated_submissions(df, submitted_files, homework_dir, output_dir, log_callback)
+            # 处理重复提交名单（可选：先计算内容哈希）
+            digests = None
+            if content_hash:
+                digests = self._hash_submissions(records, is_folder_project, hash_algorithm,
+                                                 log_callback, cancel_event)
+            self._process_repeated_submissions(roster, submitted_files, homework_dir, output_dir,
+                                               log_callback, digests, report_format)
+            self._report_progress(4, total_steps, progress_callback)
+            check_cancelled(cancel_event)
 
             # 重命名文件
+            # 递归查找得到的记录包含深层条目，重命名时改为按第一层重新匹配
             rename_count = self.file_renamer.rename_files(
-                df, homework_dir, rename_format, log_callback
+                roster, homework_dir, rename_format, log_callback, cancel_event,
+                records if max_depth <= 0 else None
             )
             self._log(f"成功重命名 {rename_count} 个学生的文件。", log_callback)
+            if rename_count and max_depth <= 0:
+                self._refresh_scan_index(homework_dir, roster.matcher, is_folder_project)
+            self._save_scan_index()
+            self._report_progress(5, total_steps, progress_callback)
 
             self._log(f"\n{'-'*50}", log_callback)
             self._log(f"{project_name} 项目处理完成", log_callback)
             self._log(f"{'-'*50}\n", log_callback)
 
+        except TaskCancelled:
+            self._log("处理已取消。", log_callback)
+            raise
         except Exception as e:
             self._log(f"处理失败：{str(e)}", log_callback)
             raise
 
     def rename_files_only(self, roster_path: str, homework_dir: str, 
-                         rename_format: dict, log_callback: Optional[Callable] = None) -> int:
+                         rename_format: dict, log_callback: Optional[Callable] = None,
+                         progress_callback: Optional[Callable] = None,
+                         cancel_event: Optional[threading.Event] = None) -> int:
         """
         仅重命名文件
         """
         try:
-            df = self._read_roster(roster_path)
-            count = self.file_renamer.rename_files(df, homework_dir, rename_format, log_callback)
+            roster = self._load_roster(roster_path)
+            self._report_progress(1, 2, progress_callback)
+            count = self.file_renamer.rename_files(roster, homework_dir, rename_format, log_callback, cancel_event)
+            self._report_progress(2, 2, progress_callback)
             return count
+        except TaskCancelled:
+            self._log("重命名已取消。", log_callback)
+            raise
         except Exception as e:
             self._log(f"重命名失败：{str(e)}", log_callback)
             raise
 
+    def undo_last_rename(self, homework_dir: str, log_callback: Optional[Callable] = None,
+                         progress_callback: Optional[Callable] = None,
+                         cancel_event: Optional[threading.Event] = None) -> int:
+        """
+        撤销该作业文件夹最近一次重命名（依据文件夹旁的重命名日志）
+        """
+        try:
+            self._report_progress(0, 1, progress_callback)
+            count = self.file_renamer.undo_last(homework_dir, log_callback, cancel_event)
+            self._report_progress(1, 1, progress_callback)
+            self._log(f"撤销完成，共恢复 {count} 个名称", log_callback)
+            return count
+        except TaskCancelled:
+            self._log("撤销已取消，可再次撤销以继续。", log_callback)
+            raise
+        except Exception as e:
+            self._log(f"撤销失败：{str(e)}", log_callback)
+            raise
+
+    def preview_rename(self, roster_path: str, homework_dir: str,
+                       rename_format: dict, log_callback: Optional[Callable] = None,
+                       progress_callback: Optional[Callable] = None,
+                       cancel_event: Optional[threading.Event] = None) -> Optional[RenamePlan]:
+        """
+        预览重命名（不改动磁盘）：返回带冲突分析的重命名计划，作业文件夹不存在时返回 None
+        """
+        roster = self._load_roster(roster_path)
+        self._report_progress(1, 2, progress_callback)
+        snapshot = self._scan_dir(homework_dir)
+        records = None
+        if snapshot.exists:
+            records = self._scan_submissions(
+                homework_dir, roster.matcher, rename_format.get('is_folder', False),
+                log_callback, cancel_event, snapshot
+            )
+        plan = self.file_renamer.preview(roster, homework_dir, rename_format, cancel_event, snapshot, records)
+        self._report_progress(2, 2, progress_callback)
+        if plan is not None:
+            self._log(f"预览：{len(plan.moves)} 个待重命名，{len(plan.conflicts)} 个冲突", log_callback)
+            if plan.pending_steps:
+                self._log(f"注意：上次重命名意外中断，执行时会先完成剩余的 {plan.pending_steps} 步", log_callback)
+        return plan
+
     def batch_check_submissions(self, roster_path: str, parent_dir: str,
                           rename_format: dict = None, 
                           selected_folders: list = None,
-                          log_callback: Optional[Callable] = None) -> str:
+                          log_callback: Optional[Callable] = None,
+                          progress_callback: Optional[Callable] = None,
+                          cancel_event: Optional[threading.Event] = None,
+                          max_workers: int = 1,
+                          report_format: Optional[str] = None,
+                          max_depth: int = 0,
+                          ignore_globs: Optional[Sequence[str]] = None,
+                          rename_workers: int = 1) -> str:
         """
         批量检查多个子文件夹的提交情况并生成汇总报告
         :param roster_path: 花名册路径
@@ -78,25 +221,30 @@ class HomeworkProcessor:
         :param rename_format: 重命名格式配置（可选，为None则不重命名）
         :param selected_folders: 指定要扫描的子文件夹列表（None则扫描全部）
         :param log_callback: 日志回调函数
-        :return: 生成的Excel报告路径
+        :param progress_callback: 进度回调 (已完成步骤数, 总步骤数)；扫描和重命名每个文件夹各算一步
+        :param cancel_event: 取消标记
+        :param max_workers: 并发扫描子文件夹的线程数（1为逐个处理）
+        :param report_format: 报告格式 xlsx / csv / parquet / jsonl（None 为 xlsx）
+        :param max_depth: 在每个实验子文件夹中递归查找提交的层数（0 只看第一层）
+        :param ignore_globs: 递归查找时在默认忽略列表之外额外忽略的通配符
+        :param rename_workers: 并发重命名子文件夹的线程数（1为逐个处理）
+        :return: 生成的报告路径
         """
-        from openpyxl import Workbook
-        from openpyxl.styles import PatternFill
         import datetime
+        import numpy as np
+        from .submission_matrix import STATUS_LABELS, SubmissionMatrix
         
         self._log(f"📂 开始扫描母文件夹: {parent_dir}", log_callback)
         
-        # 1. 读取花名册
-        df_roster = self._read_roster(roster_path)
-        all_students = set(df_roster['姓名'].tolist())
-        id_to_name = {str(row['学号']): row['姓名'] for _, row in df_roster.iterrows()}
+        # 1. 读取花名册（如需重命名，先编译模板以便尽早发现未知变量）
+        sink = get_sink(report_format)
+        roster = self._load_roster(roster_path)
+        if rename_format:
+            self.file_renamer.compile_format(rename_format, roster)
         
         # 2. 获取所有子文件夹（排除系统文件夹）
-        all_subfolders = []
-        for item in os.listdir(parent_dir):
-            item_path = os.path.join(parent_dir, item)
-            if os.path.isdir(item_path) and not item.startswith('.'):
-                all_subfolders.append(item)
+        parent_snapshot = self._scan_dir(parent_dir, missing_ok=False)
+        all_subfolders = [entry.name for entry in parent_snapshot.dirs(include_hidden=False)]
         
         # 2. 处理子文件夹顺序 - 直接使用 selected_folders 的顺序，不进行额外排序
         if selected_folders:
@@ -104,8 +252,8 @@ class HomeworkProcessor:
             valid_folders = []
             invalid_folders = []
             for folder in selected_folders:
-                folder_path = os.path.join(parent_dir, folder)
-                if os.path.exists(folder_path) and os.path.isdir(folder_path):
+                entry = parent_snapshot.get(folder)
+                if entry is not None and entry.is_dir:
                     valid_folders.append(folder)
                 else:
                     invalid_folders.append(folder)
@@ -126,102 +274,77 @@ class HomeworkProcessor:
         if not subfolders:
             raise Exception("母文件夹下没有找到有效的子文件夹（实验目录）")
         
-        # 3. 为每个学生初始化一个字典，记录每个实验的状态
-        student_status = {}
-        for _, row in df_roster.iterrows():
-            student_id = str(row['学号'])
-            student_name = row['姓名']
-            student_status[student_name] = {
-                '学号': student_id,
-                '姓名': student_name,
-                **{folder: '未交' for folder in subfolders}  # 默认所有实验都未交
-            }
+        # 3. 建立 学生 × 实验 的提交矩阵（默认所有实验都未交）
+        matrix = SubmissionMatrix.from_roster(roster, subfolders)
         
         # 4. 遍历每个子文件夹，检查提交情况（可选重命名）
-        for folder in subfolders:
-            folder_path = os.path.join(parent_dir, folder)
+        #    max_workers > 1 时并发扫描，但始终按 subfolders 的顺序合并结果和输出日志
+        #    需要重命名时，扫描全部完成后再按 rename_workers 并发重命名各子文件夹
+        total_steps = len(subfolders) * (2 if rename_format else 1)
+        folder_results = self._scan_subfolders(parent_dir, subfolders, roster, max_workers, cancel_event,
+                                               max_depth, ignore_globs)
+        for folder_index, (folder, submitted_files) in enumerate(folder_results):
             self._log(f"\n--- 检查子文件夹: {folder} ---", log_callback)
-            
-            # 收集此文件夹中已提交的学生
-            submitted_files = self._collect_submitted_files(
-                folder_path, all_students, id_to_name, False, None  # 最后一个参数设为None，不记录日志细节
-            )
-            
+
             # 更新状态
-            for student_name in submitted_files.keys():
-                if student_name in student_status:
-                    student_status[student_name][folder] = '已交'
-            
+            matrix.mark_submitted(folder, submitted_files.keys())
+
             self._log(f"  已交: {len(submitted_files)}人", log_callback)
-            
-            # 可选：执行重命名
-            if rename_format:
-                rename_count = self.file_renamer.rename_files(
-                    df_roster, folder_path, rename_format, None
-                )
-                self._log(f"  重命名: {rename_count}个文件", log_callback)
-        
-        # 5. 构建汇总DataFrame
-        # 列顺序：学号、姓名、实验1、实验2...
-        columns = ['学号', '姓名'] + subfolders
-        data = []
-        
-        for student_name, status_dict in student_status.items():
-            row = [status_dict['学号'], status_dict['姓名']]
-            row.extend([status_dict[folder] for folder in subfolders])
-            data.append(row)
+            self._report_progress(folder_index + 1, total_steps, progress_callback)
         
-        df_summary = pd.DataFrame(data, columns=columns)
-        
-        # 6. 生成Excel报告（使用openpyxl以便设置单元格样式）
+        rename_counts = {}
+        if rename_format:
+            workers = max(1, min(rename_workers, len(subfolders)))
+            self._log(f"\n--- 重命名 {len(subfolders)} 个子文件夹（{workers} 个线程）---", log_callback)
+            # 重命名阶段的耗时与 rename/scandir 计数由各线程中的 FileRenamer 记录
+            rename_counts = rename_folders(
+                parent_dir, subfolders, roster, rename_format, workers, log_callback,
+                lambda done, _: self._report_progress(len(subfolders) + done, total_steps, progress_callback),
+                cancel_event, self.file_renamer.journal_dir, self.instrumentation
+            )
+            if max_depth <= 0:
+                for folder, count in rename_counts.items():
+                    if count:
+                        self._refresh_scan_index(os.path.join(parent_dir, folder), roster.matcher, False)
+        self._save_scan_index()
+
+        # 5. 生成报告（流式写出：逐行生成；xlsx 在写入时直接附加“未交”的红色填充）
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         parent_folder_name = os.path.basename(parent_dir.rstrip(os.sep))
-        output_filename = f"作业提交汇总_{parent_folder_name}_{timestamp}.xlsx"
+        output_filename = f"作业提交汇总_{parent_folder_name}_{timestamp}"
         output_dir = os.path.join(parent_dir, "作业汇总报告")
         
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
+
+        # 列顺序：学号、姓名、实验1、实验2...、已交次数、提交率(%)
+        columns = ['学号', '姓名'] + subfolders + ['已交次数', '提交率(%)']
+        rows = (row + [int(count), round(float(rate) * 100, 1)]
+                for row, count, rate in zip(matrix.rows(), matrix.student_counts(), matrix.student_rates()))
+        style = None
+        if sink.format_name == 'xlsx':
+            # 列宽直接由数据计算：学号/姓名取花名册中最长的值，实验列取文件夹名与状态文字中较长者
+            widths = [
+                fit_width(['学号'] + matrix.student_ids),
+                fit_width(['姓名'] + matrix.students),
+            ] + [fit_width([folder, *STATUS_LABELS.values()]) for folder in subfolders] + [
+                fit_width(['已交次数']), fit_width(['提交率(%)'])
+            ]
+            style = dict(widths=widths, freeze_panes='C2', highlight={'未交': 'FFFF9999'}, highlight_from=2)
+
+        with self.instrumentation.stage(STAGE_REPORT_WRITE):
+            output_path = sink.write(os.path.join(output_dir, output_filename),
+                                     [ReportTable('提交汇总', columns, rows, style)])[0]
         
-        output_path = os.path.join(output_dir, output_filename)
-        
-        # 使用openpyxl创建带格式的Excel
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            df_summary.to_excel(writer, index=False, sheet_name='提交汇总')
-            
-            # 获取workbook和worksheet对象以设置格式
-            workbook = writer.book
-            worksheet = writer.sheets['提交汇总']
-            
-            # 定义红色填充（用于“未交”单元格）
-            red_fill = PatternFill(start_color='FFFF9999', end_color='FFFF9999', fill_type='solid')
-            
-            # 遍历所有单元格，为“未交”标记红色
-            for row in worksheet.iter_rows(min_row=2, max_row=len(df_summary)+1, min_col=3, max_col=len(columns)):
-                for cell in row:
-                    if cell.value == '未交':
-                        cell.fill = red_fill
-            
-            # 设置列宽
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 30)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            # 冻结前两列（学号、姓名）
-            worksheet.freeze_panes = 'C2'
-        
-        # 7. 统计信息
-        total_students = len(df_summary)
-        total_labs = len(subfolders)
-        total_submissions = (df_summary.iloc[:, 2:] == '已交').sum().sum()  # 统计所有“已交”
-        submission_rate = total_submissions / (total_students * total_labs) * 100 if total_students * total_labs > 0 else 0
+        # 6. 统计信息（均由提交矩阵向量化计算）
+        total_students, total_labs = matrix.shape
+        total_submissions = matrix.total_submissions
+        submission_rate = matrix.overall_rate * 100
+        lab_counts = matrix.lab_counts()
+        lab_rates = matrix.lab_rates()
+        _, current_streaks = matrix.missing_streaks()
+        streak_students = [f"{matrix.students[row]}({current_streaks[row]})"
+                           for row in np.flatnonzero(current_streaks >= MISSING_STREAK_ALERT)]
         
         self._log(f"\n" + "="*60, log_callback)
         self._log(f"📊 汇总统计:", log_callback)
@@ -229,105 +352,250 @@ class HomeworkProcessor:
         self._log(f"  实验总数: {total_labs}", log_callback)
         self._log(f"  总提交次数: {total_submissions}", log_callback)
         self._log(f"  总提交率: {submission_rate:.1f}%", log_callback)
+        self._log("  各实验提交: " + ", ".join(
+            f"{folder} {count}人 {rate * 100:.1f}%"
+            for folder, count, rate in zip(subfolders, lab_counts, lab_rates)), log_callback)
+        if streak_students:
+            self._log(f"  最近连续未交≥{MISSING_STREAK_ALERT}次: {', '.join(streak_students)}", log_callback)
+        if rename_format:
+            renamed = sum(count for count in rename_counts.values() if count is not None)
+            self._log(f"  重命名: 共 {renamed} 个（" + ", ".join(
+                f"{folder} {'失败' if rename_counts.get(folder) is None else rename_counts[folder]}"
+                for folder in subfolders) + "）", log_callback)
         self._log(f"  报告位置: {output_path}", log_callback)
         self._log("="*60, log_callback)
         
         return output_path
 
-    def _read_roster(self, roster_path: str) -> pd.DataFrame:
-        """读取花名册文件"""
-        return pd.read_excel(roster_path, dtype={'学号': str})
+    def _scan_subfolders(self, parent_dir: str, subfolders: List[str], roster: RosterIndex,
+                         max_workers: int, cancel_event: Optional[threading.Event],
+                         max_depth: int = 0, ignore_globs: Optional[Sequence[str]] = None):
+        """
+        扫描各子文件夹，按 subfolders 的顺序逐个产出 (文件夹名, 已交学生文件字典)
+        """
+        def check_folder(folder):
+            check_cancelled(cancel_event)
+            folder_path = os.path.join(parent_dir, folder)
+            snapshot = self._scan_dir(folder_path)
+            # 收集此文件夹中已提交的学生（日志回调设为None，不记录日志细节）
+            records = self._scan_submissions(
+                folder_path, roster.matcher, False, None, cancel_event, snapshot, max_depth, ignore_globs
+            )
+            return folder, group_by_student(records)
 
-    def _collect_submitted_files(self, homework_dir: str, all_students: set, 
-                               id_to_name: Dict[str, str], is_folder_project: bool,
-                               log_callback: Optional[Callable]) -> Dict[str, List[str]]:
+        if max_workers <= 1 or len(subfolders) <= 1:
+            for folder in subfolders:
+                yield check_folder(folder)
+            return
+
+        roster.ensure_matcher()  # 预先在主线程构建匹配器，避免各线程重复构建
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(subfolders)),
+                                      thread_name_prefix="batch-scan")
+        try:
+            futures = [executor.submit(check_folder, folder) for folder in subfolders]
+            for future in futures:
+                yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def load_roster(self, roster_path: str) -> RosterIndex:
+        """读取花名册索引（文件未变化时直接使用缓存）"""
+        return self.roster_cache.get(roster_path, self._parse_roster)
+
+    def _load_roster(self, roster_path: str) -> RosterIndex:
+        """读取花名册并构建索引"""
+        with self.instrumentation.stage(STAGE_ROSTER_LOAD):
+            roster = self.load_roster(roster_path)
+        self.instrumentation.count('roster.students', len(roster))
+        return roster
+
+    def _scan_dir(self, path: str, missing_ok: bool = True) -> DirSnapshot:
+        """列出目录（计入“列目录”阶段和 scandir 次数）"""
+        return scan_dir(path, missing_ok, self.instrumentation)
+
+    def _parse_roster(self, roster_path: str) -> RosterIndex:
+        """解析花名册文件（缓存未命中时调用）"""
+        return load_roster_index(roster_path)
+
+    def _collect_submitted_files(self, homework_dir: str, matcher: StudentMatcher,
+                               is_folder_project: bool,
+                               log_callback: Optional[Callable],
+                               cancel_event: Optional[threading.Event] = None,
+                               snapshot: Optional[DirSnapshot] = None,
+                               max_depth: int = 0,
+                               ignore_globs: Optional[Sequence[str]] = None) -> Dict[str, List[str]]:
         """收集已提交作业的学生和文件"""
-        submitted_files = {}
+        records = self._scan_submissions(
+            homework_dir, matcher, is_folder_project, log_callback, cancel_event, snapshot,
+            max_depth, ignore_globs
+        )
+        return group_by_student(records)
 
-        if not os.path.exists(homework_dir):
+    def _scan_submissions(self, homework_dir: str, matcher: StudentMatcher,
+                          is_folder_project: bool,
+                          log_callback: Optional[Callable],
+                          cancel_event: Optional[threading.Event] = None,
+                          snapshot: Optional[DirSnapshot] = None,
+                          max_depth: int = 0,
+                          ignore_globs: Optional[Sequence[str]] = None) -> List[MatchRecord]:
+        """
+        扫描并匹配作业文件夹，返回匹配记录（命中多个学生时给出歧义提示）
+        :param max_depth: 大于 0 时递归查找子目录（第一层按项目类型取舍，更深层文件和文件夹都参与匹配，见 discover_submissions）
+        """
+        if snapshot is None:
+            snapshot = self._scan_dir(homework_dir)
+        if not snapshot.exists:
             self._log(f"警告：作业文件夹不存在: {homework_dir}", log_callback)
-            return submitted_files
+            return []
 
-        if is_folder_project:
-            # 处理文件夹项目
-            for item in os.listdir(homework_dir):
-                item_path = os.path.join(homework_dir, item)
-                if os.path.isdir(item_path):
-                    self._match_student(item, item, all_students, id_to_name, submitted_files)
-        else:
-            # 处理文件项目
-            for filename in os.listdir(homework_dir):
-                filepath = os.path.join(homework_dir, filename)
-                if filename.startswith('~$') or os.path.isdir(filepath):
-                    continue
-                self._match_student(filename, filename, all_students, id_to_name, submitted_files)
-
-        return submitted_files
-
-    def _match_student(self, search_text: str, file_item: str, all_students: set,
-                      id_to_name: Dict[str, str], submitted_files: Dict[str, List[str]]):
-        """匹配学生姓名或学号"""
-        # 先尝试匹配姓名
-        for name in all_students:
-            if name in search_text:
-                if name not in submitted_files:
-                    submitted_files[name] = []
-                submitted_files[name].append(file_item)
-                return
-
-        # 再尝试匹配学号
-        for student_id, name in id_to_name.items():
-            if student_id in search_text:
-                if name not in submitted_files:
-                    submitted_files[name] = []
-                submitted_files[name].append(file_item)
-                return
-
-    def _process_missing_students(self, df: pd.DataFrame, submitted_files: Dict[str, List[str]],
-                                homework_dir: str, output_dir: str, log_callback: Optional[Callable]):
-        """处理未交作业学生"""
+        with self.instrumentation.stage(STAGE_MATCHING):
+            if max_depth > 0:
+                records = discover_submissions(homework_dir, matcher, max_depth, ignore_globs, cancel_event,
+                                               is_folder_project, self.instrumentation)
+            elif self.scan_index is None:
+                records = scan_submissions(snapshot, matcher, is_folder_project, cancel_event)
+            else:
+                cached = self.scan_index.get_entries(homework_dir, matcher.fingerprint, is_folder_project)
+                fresh = {}
+                records = scan_submissions(snapshot, matcher, is_folder_project, cancel_event, cached, fresh)
+                self.scan_index.set_entries(homework_dir, matcher.fingerprint, is_folder_project, fresh)
+        self.instrumentation.count('matches', len(records))
+
+        if log_callback:
+            for record in records:
+                if record.is_ambiguous:
+                    self._log(f"提示：{record.name} 同时匹配到多个学生（{', '.join(record.candidates)}），"
+                              f"按 {record.student} 处理", log_callback)
+        return records
+
+    def write_missing_students(self, roster: RosterIndex, submitted_files: Dict[str, List[str]],
+                               homework_dir: str, output_dir: str, log_callback: Optional[Callable] = None,
+                               report_format: Optional[str] = None):
+        """
+        写出未交作业名单（单次检查和监视模式共用）
+        :param submitted_files: 学生 → 已交条目名称列表
+        """
         submitted_students = set(submitted_files.keys())
-        all_students = set(df['姓名'].tolist())
+        all_students = set(roster.names)
         missing_students = all_students - submitted_students
 
         if missing_students:
-            missing_df = df[df['姓名'].isin(missing_students)].copy()
-            missing_df['学号'] = missing_df['学号'].astype(str)
+            id_pos = roster.columns.index('学号')
+            missing_rows = ([student_id_text(value) if position == id_pos else value
+                             for position, value in enumerate(row)]
+                            for row in roster.rows_for(missing_students))
 
             folder_name = os.path.basename(homework_dir.rstrip(os.sep))
-            output_path = os.path.join(output_dir, f"未交作业名单_{folder_name}.xlsx")
-            missing_df.to_excel(output_path, index=False)
+            with self.instrumentation.stage(STAGE_REPORT_WRITE):
+                output_paths = get_sink(report_format).write(
+                    os.path.join(output_dir, f"未交作业名单_{folder_name}"),
+                    [ReportTable('Sheet1', roster.columns, missing_rows)]
+                )
 
-            self._log(f"生成未交报告：{output_path}", log_callback)
+            self._log(f"生成未交报告：{', '.join(output_paths)}", log_callback)
             self._log(f"未交人数：{len(missing_students)}，名单：{', '.join(missing_students)}", log_callback)
         else:
             self._log("所有学生均已提交作业！", log_callback)
 
-    def _process_repeated_submissions(self, df: pd.DataFrame, submitted_files: Dict[str, List[str]],
-                                    homework_dir: str, output_dir: str, log_callback: Optional[Callable]):
-        """处理重复提交"""
+    def _hash_submissions(self, records: List[MatchRecord], is_folder_project: bool,
+                          hash_algorithm: Optional[str], log_callback: Optional[Callable],
+                          cancel_event: Optional[threading.Event] = None) -> Optional[Dict[str, str]]:
+        """计算已匹配文件的内容哈希（文件夹项目不比对内容）"""
+        if is_folder_project:
+            self._log("文件夹项目不进行内容比对。", log_callback)
+            return None
+        with self.instrumentation.stage(STAGE_CONTENT_HASH):
+            digests = self.content_hasher.hash_entries(
+                [(record.name, record.entry) for record in records], hash_algorithm, cancel_event, log_callback
+            )
+        self.instrumentation.count('files.hashed', len(digests))
+        self._log(f"已比对 {len(digests)} 个文件的内容。", log_callback)
+        return digests
+
+    def _process_repeated_submissions(self, roster: RosterIndex, submitted_files: Dict[str, List[str]],
+                                    homework_dir: str, output_dir: str, log_callback: Optional[Callable],
+                                    digests: Optional[Dict[str, str]] = None,
+                                    report_format: Optional[str] = None):
+        """
+        处理重复提交
+        :param digests: 条目名称（递归查找时为相对路径） → 内容哈希；提供时额外标记内容完全相同的重复提交，
+                        并列出不同学生之间内容相同的文件
+        """
+        identical, shared = find_identical(submitted_files, digests) if digests is not None else ({}, [])
+
         repeated_records = []
         for name, files in submitted_files.items():
             if len(files) > 1:
-                student_info = df[df['姓名'] == name].iloc[0]
                 marked_files = [f"*{f}" for f in files]
-                repeated_records.append({
-                    "学号": student_info['学号'],
+                record = {
+                    "学号": roster.name_to_id[name],
                     "姓名": name,
                     "提交文件": ", ".join(marked_files),
                     "提交次数": len(files)
-                })
+                }
+                if digests is not None:
+                    record["内容完全相同"] = "; ".join(" = ".join(group) for group in identical.get(name, []))
+                repeated_records.append(record)
+
+        shared_records = [{
+            "内容哈希": digest[:16],
+            "学生": ", ".join(dict.fromkeys(f"{student}({roster.name_to_id[student]})"
+                                            if roster.name_to_id[student] else str(student)
+                                            for student, _ in members)),
+            "文件": ", ".join(file_name for _, file_name in members),
+            "人数": len({student for student, _ in members}),
+        } for digest, members in shared]
+
+        if repeated_records or shared_records:
+            repeat_columns = ["学号", "姓名", "提交文件", "提交次数"]
+            tables = []
+            if digests is None:
+                tables.append(ReportTable('Sheet1', repeat_columns,
+                                          [list(record.values()) for record in repeated_records]))
+            else:
+                repeat_columns.append("内容完全相同")
+                shared_columns = ["内容哈希", "学生", "文件", "人数"]
+                tables.append(ReportTable("重复提交", repeat_columns,
+                                          [list(record.values()) for record in repeated_records]))
+                tables.append(ReportTable("不同学生相同文件", shared_columns,
+                                          [list(record.values()) for record in shared_records]))
 
-        if repeated_records:
-            repeat_df = pd.DataFrame(repeated_records)
             folder_name = os.path.basename(homework_dir.rstrip(os.sep))
-            repeat_path = os.path.join(output_dir, f"重复提交名单_{folder_name}.xlsx")
-            repeat_df.to_excel(repeat_path, index=False)
+            with self.instrumentation.stage(STAGE_REPORT_WRITE):
+                repeat_paths = get_sink(report_format).write(
+                    os.path.join(output_dir, f"重复提交名单_{folder_name}"), tables
+                )
+            self._log(f"生成重复提交报告：{', '.join(repeat_paths)}", log_callback)
 
-            self._log(f"生成重复提交报告：{repeat_path}", log_callback)
+        if repeated_records:
             self._log(f"重复提交人数：{len(repeated_records)}，名单：{', '.join([r['姓名'] for r in repeated_records])}", log_callback)
         else:
             self._log("没有重复提交的学生。", log_callback)
+        if identical:
+            self._log(f"内容完全相同的重复提交：{', '.join(identical)}", log_callback)
+        if shared_records:
+            self._log(f"⚠ 发现 {len(shared_records)} 组不同学生之间内容相同的文件：", log_callback)
+            for record in shared_records:
+                self._log(f"  {record['学生']}: {record['文件']}", log_callback)
+
+    def _refresh_scan_index(self, homework_dir: str, matcher: StudentMatcher, is_folder_project: bool):
+        """重命名后重新登记文件夹的条目，使索引中保存的是改名后的名称（未启用索引时不做任何事）"""
+        if self.scan_index is not None:
+            self._scan_submissions(homework_dir, matcher, is_folder_project, None)
+
+    def _save_scan_index(self):
+        """保存增量扫描索引（写入失败不影响检查结果）"""
+        if self.scan_index is None:
+            return
+        try:
+            self.scan_index.save()
+        except OSError:
+            pass
+
+    def _report_progress(self, done: int, total: int, progress_callback: Optional[Callable]):
+        """汇报进度"""
+        if progress_callback:
+            progress_callback(done, total)
 
     def _log(self, message: str, log_callback: Optional[Callable]):
         """记录日志"""
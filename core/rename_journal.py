@@ -0,0 +1,210 @@
+# core/rename_journal.py
+import datetime
+import json
+import os
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from .json_store import folder_key
+
+# 日志文件统一放在配置目录下（按作业文件夹路径区分），不在作业文件夹旁留下文件
+JOURNAL_DIR = os.path.join('config', 'rename_journals')
+JOURNAL_SUFFIX = '.jsonl'
+# 每写入多少条改名记录执行一次 fsync（开始/结束记录总是立即 fsync）
+DEFAULT_SYNC_EVERY = 64
+
+KIND_RENAME = 'rename'
+KIND_UNDO = 'undo'
+
+
+class JournalOp(NamedTuple):
+    """
+    一步改名操作
+    original/final 是所属条目的原名称和最终名称；借助临时名称解开循环时，
+    一个条目会拆成两步（原名称→临时名称→最终名称）。
+    """
+    source: str
+    target: str
+    original: str
+    final: str
+    is_dir: bool = False
+
+
+class JournalRun:
+    """日志中的一次运行（重命名或撤销）"""
+
+    def __init__(self, run_id: str, kind: str, operations: List[JournalOp],
+                 reverts: Optional[str] = None, time: str = ''):
+        self.run_id = run_id
+        self.kind = kind
+        self.operations = operations
+        self.reverts = reverts
+        self.time = time
+        self.done: Dict[int, dict] = {}     # 步骤序号 → 完成记录
+        self.skipped: set = set()           # 跳过的步骤序号
+        self.committed = False
+        self.aborted = False    # 被用户取消（已完成的步骤保留，可撤销，但不会自动续做）
+        self.reverted = False
+
+    @property
+    def is_pending(self) -> bool:
+        """未正常结束、未被取消、也未被撤销的运行（程序崩溃或掉电中断）"""
+        return not self.committed and not self.aborted and not self.reverted
+
+    @property
+    def remaining(self) -> List[int]:
+        """尚未执行（也未跳过）的步骤序号"""
+        return [index for index in range(len(self.operations))
+                if index not in self.done and index not in self.skipped]
+
+    def done_operations(self) -> List[JournalOp]:
+        """已完成的步骤（按执行顺序）"""
+        return [self.operations[index] for index in sorted(self.done)]
+
+
+def journal_path(homework_dir: str, journal_dir: str = JOURNAL_DIR) -> str:
+    """作业文件夹对应的日志文件路径（与增量扫描索引相同，按绝对路径的摘要命名）"""
+    return os.path.join(journal_dir, folder_key(homework_dir) + JOURNAL_SUFFIX)
+
+
+class RenameJournal:
+    """
+    只追加的重命名日志（JSON Lines）
+    每次运行先写入 begin（包含全部计划步骤），每完成一步追加 step，最后写入 commit；
+    被用户取消时写入 abort，这样的运行不会在下次重命名时被自动续做。
+    改名记录按批 fsync；掉电丢失的尾部记录在续做时通过检查磁盘状态补齐。
+    """
+
+    def __init__(self, homework_dir: str, journal_dir: str = JOURNAL_DIR,
+                 sync_every: int = DEFAULT_SYNC_EVERY):
+        self.homework_dir = homework_dir
+        self.path = journal_path(homework_dir, journal_dir)
+        self.sync_every = max(1, sync_every)
+        self.run_id: Optional[str] = None
+        self._file = None
+        self._unsynced = 0
+
+    # --- 写入 ---
+    def open(self):
+        """打开日志文件准备追加（目录不存在时创建；无法写入时抛出 OSError）"""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def begin(self, operations: Sequence[JournalOp], kind: str = KIND_RENAME,
+              reverts: Optional[str] = None) -> str:
+        """开始一次新的运行，返回运行编号"""
+        self.run_id = uuid.uuid4().hex[:12]
+        self._write({
+            'op': 'begin', 'run': self.run_id, 'kind': kind, 'reverts': reverts,
+            'dir': os.path.abspath(self.homework_dir), 'time': self._now(),
+            'operations': [list(operation) for operation in operations],
+        }, sync=True)
+        return self.run_id
+
+    def attach(self, run: JournalRun):
+        """继续写入一次已存在的运行（续做中断的运行时使用）"""
+        self.run_id = run.run_id
+
+    def record(self, index: int, operation: JournalOp, inode: int = 0):
+        """记录完成的一步"""
+        self._write({
+            'op': 'step', 'run': self.run_id, 'i': index,
+            'source': operation.source, 'target': operation.target,
+            'inode': inode, 'time': self._now(),
+        })
+
+    def skip(self, index: int, reason: str):
+        """记录被跳过的一步"""
+        self._write({'op': 'skip', 'run': self.run_id, 'i': index, 'reason': reason})
+
+    def abort(self, count: int):
+        """运行被用户取消：剩余步骤作废，下次不会自动续做"""
+        self._write({'op': 'abort', 'run': self.run_id, 'count': count, 'time': self._now()}, sync=True)
+
+    def commit(self, count: int):
+        """运行正常结束"""
+        self._write({'op': 'commit', 'run': self.run_id, 'count': count, 'time': self._now()}, sync=True)
+
+    def close(self):
+        """写出尚未同步的记录并关闭文件"""
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'RenameJournal':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write(self, record: dict, sync: bool = False):
+        self.open()
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._unsynced += 1
+        if sync or self._unsynced >= self.sync_every:
+            self._sync()
+
+    def _sync(self):
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.datetime.now().isoformat(timespec='seconds')
+
+    # --- 读取 ---
+    def runs(self) -> List[JournalRun]:
+        """按时间顺序读取所有运行（忽略写了一半的末行）"""
+        runs: Dict[str, JournalRun] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            op = record.get('op')
+            if op == 'begin':
+                operations = [JournalOp(*operation) for operation in record.get('operations', [])]
+                runs[record['run']] = JournalRun(record['run'], record.get('kind', KIND_RENAME),
+                                                 operations, record.get('reverts'), record.get('time', ''))
+                continue
+            run = runs.get(record.get('run'))
+            if run is None:
+                continue
+            if op == 'step':
+                run.done[record['i']] = record
+            elif op == 'skip':
+                run.skipped.add(record['i'])
+            elif op == 'commit':
+                run.committed = True
+            elif op == 'abort':
+                run.aborted = True
+
+        for run in runs.values():
+            # 被取消的撤销只恢复了一部分：原运行仍可再次撤销（已恢复的步骤在执行时核对后跳过）
+            if run.kind == KIND_UNDO and run.reverts in runs and not run.aborted:
+                runs[run.reverts].reverted = True
+        return list(runs.values())
+
+    def pending_run(self) -> Optional[JournalRun]:
+        """最近一次中断的运行（没有则返回 None）"""
+        runs = self.runs()
+        if runs and runs[-1].is_pending:
+            return runs[-1]
+        return None
+
+    def last_undoable_run(self) -> Optional[JournalRun]:
+        """最近一次尚未撤销、且确有改名的重命名运行"""
+        for run in reversed(self.runs()):
+            if run.kind == KIND_RENAME and not run.reverted and run.done:
+                return run
+        return None
@@ -0,0 +1,173 @@
+# core/rename_plan.py
+import os
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# 条目状态（预演结果）
+STATUS_RENAME = '重命名'
+STATUS_NOOP = '无需改名'
+STATUS_EXISTS = '目标已存在'
+STATUS_DUPLICATE = '目标重复'
+
+TEMP_PREFIX = '.~rename_tmp_'
+
+
+class PlanEntry(NamedTuple):
+    """重命名计划中的一行：原名称、目标名称、学生、是否为文件夹"""
+    source: str
+    target: str
+    student: str
+    is_dir: bool = False
+
+    @property
+    def is_noop(self) -> bool:
+        return self.source == self.target
+
+
+class RenamePlan:
+    """
+    重命名计划表（原名称 → 目标名称 → 学生）
+    先整体生成、可查看和比较，再统一执行。
+    传入目录快照中的现有名称后，会在内存中预演：
+    找出无需改名、目标已存在、多个条目目标重复的情况，并为互换（A→B、B→A）等循环安排临时名称。
+    """
+
+    COLUMNS = ['source', 'target', 'student', 'is_dir']
+
+    def __init__(self, homework_dir: str, entries: List[PlanEntry],
+                 existing_names: Optional[Iterable[str]] = None,
+                 inodes: Optional[Dict[str, int]] = None):
+        self.homework_dir = homework_dir
+        self.entries = list(entries)
+        self.existing_names: Optional[Set[str]] = set(existing_names) if existing_names is not None else None
+        # 原名称 → 索引节点号（写入重命名日志）
+        self.inodes: Dict[str, int] = dict(inodes or {})
+        # 执行前会先续做的上次中断运行的剩余步骤数（由 FileRenamer.preview 填写）
+        self.pending_steps = 0
+        self._statuses: Optional[List[str]] = None
+
+    def __iter__(self) -> Iterator[PlanEntry]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def changes(self) -> List[PlanEntry]:
+        """实际需要改名的条目（排除原名与目标相同的）"""
+        return [entry for entry in self.entries if not entry.is_noop]
+
+    @property
+    def statuses(self) -> List[str]:
+        """与 entries 一一对应的预演状态"""
+        if self._statuses is None:
+            self._statuses = self._analyze()
+        return self._statuses
+
+    @property
+    def moves(self) -> List[PlanEntry]:
+        """预演通过、将实际执行的改名"""
+        return [entry for entry, status in zip(self.entries, self.statuses) if status == STATUS_RENAME]
+
+    @property
+    def conflicts(self) -> List[Tuple[PlanEntry, str]]:
+        """因冲突而跳过的条目 (条目, 状态)"""
+        return [(entry, status) for entry, status in zip(self.entries, self.statuses)
+                if status in (STATUS_EXISTS, STATUS_DUPLICATE)]
+
+    def _analyze(self) -> List[str]:
+        """
+        预演：纯内存计算，不访问磁盘
+        名称比较使用 os.path.normcase（Windows 下不区分大小写）。
+        同一目标有多个来源时，已经是该名称的条目优先，其次按计划顺序取第一个；
+        目标被现有条目占用、且占用者不会被改走时视为目标已存在（逐轮传递直到稳定）。
+        """
+        key = os.path.normcase
+        existing = {key(name) for name in (self.existing_names or ())}
+        existing.update(key(entry.source) for entry in self.entries)
+
+        statuses = [STATUS_NOOP if entry.is_noop else STATUS_RENAME for entry in self.entries]
+
+        claimed: Dict[str, int] = {}
+        for position, entry in enumerate(self.entries):
+            if statuses[position] == STATUS_NOOP:
+                claimed[key(entry.target)] = position
+        for position, entry in enumerate(self.entries):
+            if statuses[position] != STATUS_RENAME:
+                continue
+            if claimed.setdefault(key(entry.target), position) != position:
+                statuses[position] = STATUS_DUPLICATE
+
+        changed = True
+        while changed:
+            changed = False
+            vacated = {key(entry.source) for entry, status in zip(self.entries, statuses)
+                       if status == STATUS_RENAME}
+            for position, entry in enumerate(self.entries):
+                if statuses[position] != STATUS_RENAME:
+                    continue
+                target = key(entry.target)
+                # 仅大小写不同的改名（Windows）占用的是自己
+                if target in existing and target not in vacated and target != key(entry.source):
+                    statuses[position] = STATUS_EXISTS
+                    changed = True
+        return statuses
+
+    def operations(self) -> List[Tuple[str, str, PlanEntry]]:
+        """
+        按可安全执行的顺序返回 (原名称, 新名称, 条目) 列表
+        目标仍被其他待改名条目占用时先执行别的；只剩循环时把其中一个先改成临时名称。
+        """
+        key = os.path.normcase
+        pending: List[Tuple[str, PlanEntry]] = [(entry.source, entry) for entry in self.moves]
+        taken = {key(name) for name in (self.existing_names or ())}
+        taken.update(key(entry.source) for entry in self.entries)
+        taken.update(key(entry.target) for entry in self.entries)
+
+        operations: List[Tuple[str, str, PlanEntry]] = []
+        temp_counter = 0
+        while pending:
+            occupied = {key(source) for source, _ in pending}
+            remaining = []
+            for source, entry in pending:
+                target = key(entry.target)
+                if target in occupied and target != key(source):
+                    remaining.append((source, entry))
+                else:
+                    operations.append((source, entry.target, entry))
+                    occupied.discard(key(source))
+
+            if len(remaining) == len(pending):
+                # 剩下的全部处于循环中：把第一个改成临时名称以打开循环
+                source, entry = remaining[0]
+                while True:
+                    temp_counter += 1
+                    temp_name = f"{TEMP_PREFIX}{temp_counter}_{entry.target}"
+                    if key(temp_name) not in taken:
+                        break
+                taken.add(key(temp_name))
+                operations.append((source, temp_name, entry))
+                remaining[0] = (temp_name, entry)
+            pending = remaining
+        return operations
+
+    def to_frame(self):
+        """以 DataFrame 形式返回计划表（含预演状态），便于查看或导出"""
+        import pandas as pd
+        frame = pd.DataFrame(self.entries, columns=self.COLUMNS)
+        frame['status'] = self.statuses
+        return frame
+
+    def to_records(self) -> List[Dict]:
+        return [dict(entry._asdict(), status=status) for entry, status in zip(self.entries, self.statuses)]
+
+    def diff(self, other: 'RenamePlan') -> List[Dict[str, Optional[str]]]:
+        """与另一份计划比较，返回目标名称不同的条目 {source, target, other_target}"""
+        other_targets = {entry.source: entry.target for entry in other.entries}
+        differences = []
+        for entry in self.entries:
+            other_target = other_targets.pop(entry.source, None)
+            if other_target != entry.target:
+                differences.append({'source': entry.source, 'target': entry.target, 'other_target': other_target})
+        for source, other_target in other_targets.items():
+            differences.append({'source': source, 'target': None, 'other_target': other_target})
+        return differences
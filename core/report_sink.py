@@ -0,0 +1,158 @@
+# core/report_sink.py
+import abc
+import csv
+import json
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+DEFAULT_REPORT_FORMAT = 'xlsx'
+
+
+class ReportTable(NamedTuple):
+    """
+    一张报告表
+    name 在 xlsx 中作为工作表名，其他格式有多张表时作为文件名后缀；
+    style 只对 xlsx 生效（widths, freeze_panes, highlight, highlight_from，见 xlsx_writer）。
+    """
+    name: str
+    columns: Sequence[str]
+    rows: Iterable[Sequence[Any]]
+    style: Optional[Dict[str, Any]] = None
+
+
+def clean_value(value: Any) -> Any:
+    """NaN/None 统一为 None，NumPy 标量转为 Python 原生类型"""
+    if value is None:
+        return None
+    try:
+        if value != value:  # NaN
+            return None
+    except (TypeError, ValueError):  # pd.NA 等
+        return None
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        try:
+            return value.item()
+        except (TypeError, ValueError):
+            pass
+    return value
+
+
+class ReportSink(abc.ABC):
+    """
+    报告输出后端：把若干张表写到 base_path + 扩展名
+    子类必须实现 write_table（一张表写一个文件）；支持多表的格式可另行重写 write。
+    """
+
+    format_name = ''
+    extension = ''
+
+    def write(self, base_path: str, tables: List[ReportTable]) -> List[str]:
+        """
+        :param base_path: 不含扩展名的输出路径
+        :return: 实际写出的文件路径（多张表且格式不支持多表时每张表一个文件）
+        """
+        if len(tables) == 1:
+            paths = [base_path + self.extension]
+        else:
+            paths = [f"{base_path}_{table.name}{self.extension}" for table in tables]
+        for path, table in zip(paths, tables):
+            self.write_table(path, table)
+        return paths
+
+    @abc.abstractmethod
+    def write_table(self, path: str, table: ReportTable):
+        """把一张表写到 path"""
+
+
+class XlsxSink(ReportSink):
+    """Excel：多张表写在同一个工作簿中，支持填充色、列宽和冻结窗格"""
+
+    format_name = 'xlsx'
+    extension = '.xlsx'
+
+    def write(self, base_path: str, tables: List[ReportTable]) -> List[str]:
+        path = base_path + self.extension
+        self._write_sheets(path, tables)
+        return [path]
+
+    def write_table(self, path: str, table: ReportTable):
+        self._write_sheets(path, [table])
+
+    @staticmethod
+    def _write_sheets(path: str, tables: List[ReportTable]):
+        from .xlsx_writer import write_xlsx_sheets
+
+        write_xlsx_sheets(path, [dict(
+            sheet_name=table.name, columns=table.columns,
+            rows=([clean_value(value) for value in row] for row in table.rows),
+            **(table.style or {})
+        ) for table in tables])
+
+
+class CsvSink(ReportSink):
+    """CSV（UTF-8 带 BOM，Excel 可直接打开）"""
+
+    format_name = 'csv'
+    extension = '.csv'
+
+    def write_table(self, path: str, table: ReportTable):
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(table.columns)
+            for row in table.rows:
+                writer.writerow(['' if value is None else value for value in map(clean_value, row)])
+
+
+class JsonLinesSink(ReportSink):
+    """JSON Lines：每行一个 {列名: 值} 对象"""
+
+    format_name = 'jsonl'
+    extension = '.jsonl'
+
+    def write_table(self, path: str, table: ReportTable):
+        columns = list(table.columns)
+        with open(path, 'w', encoding='utf-8') as f:
+            for row in table.rows:
+                record = dict(zip(columns, map(clean_value, row)))
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+
+class ParquetSink(ReportSink):
+    """Parquet（需要 pyarrow）"""
+
+    format_name = 'parquet'
+    extension = '.parquet'
+
+    def __init__(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("输出 Parquet 报告需要安装 pyarrow（pip install pyarrow）")
+
+    def write_table(self, path: str, table: ReportTable):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = list(table.columns)
+        data: Dict[str, list] = {column: [] for column in columns}
+        for row in table.rows:
+            for column, value in zip(columns, row):
+                data[column].append(clean_value(value))
+        pq.write_table(pa.table(data), path)
+
+
+REPORT_SINKS = {sink.format_name: sink for sink in (XlsxSink, CsvSink, ParquetSink, JsonLinesSink)}
+REPORT_FORMATS = tuple(REPORT_SINKS)
+
+
+def get_sink(report_format: Optional[str] = None) -> ReportSink:
+    """
+    按格式名获取输出后端（None 为 xlsx）
+    :raises ValueError: 未知格式，或所需的可选依赖未安装
+    """
+    report_format = (report_format or DEFAULT_REPORT_FORMAT).lower().lstrip('.')
+    if report_format == 'json':
+        report_format = 'jsonl'
+    sink_class = REPORT_SINKS.get(report_format)
+    if sink_class is None:
+        raise ValueError(f"不支持的报告格式：{report_format}（可选：{', '.join(REPORT_FORMATS)}）")
+    return sink_class()
@@ -0,0 +1,81 @@
+# core/roster_cache.py
+import hashlib
+import os
+import pickle
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from .json_store import write_atomic
+from .roster_index import RosterIndex
+
+# 旁路缓存文件格式版本，结构变化时递增以自动作废旧缓存
+CACHE_VERSION = 2
+
+
+class RosterCache:
+    """
+    花名册缓存
+    以 (绝对路径, 修改时间, 文件大小) 为键保存已解析的花名册：
+    同一会话内直接复用内存中的索引；指定 cache_dir 时还会写入 pickle 旁路文件，
+    程序重启后只要花名册未改动就无需再次解析 Excel。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._entries: Dict[str, Tuple[tuple, RosterIndex]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, roster_path: str, loader: Callable[[str], RosterIndex]) -> RosterIndex:
+        """获取花名册索引，文件未变化时跳过解析"""
+        path = os.path.abspath(roster_path)
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == key:
+                return entry[1]
+
+        roster = self._load_sidecar(path, key)
+        if roster is None:
+            roster = loader(roster_path)
+            self._save_sidecar(path, key, roster)
+
+        with self._lock:
+            self._entries[path] = (key, roster)
+        return roster
+
+    def _sidecar_path(self, path: str) -> str:
+        digest = hashlib.md5(path.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"roster_{digest}.pkl")
+
+    def _load_sidecar(self, path: str, key: tuple) -> Optional[RosterIndex]:
+        """读取旁路缓存，键不一致或文件损坏时返回 None"""
+        if not self.cache_dir:
+            return None
+        sidecar = self._sidecar_path(path)
+        try:
+            with open(sidecar, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('version') != CACHE_VERSION or data.get('path') != path or tuple(data.get('key', ())) != key:
+                return None
+            return RosterIndex(data['columns'], data['rows'])
+        except Exception:
+            return None
+
+    def _save_sidecar(self, path: str, key: tuple, roster: RosterIndex):
+        """写入旁路缓存（先写临时文件再替换，失败时静默忽略）"""
+        if not self.cache_dir:
+            return
+        data = {
+            'version': CACHE_VERSION,
+            'path': path,
+            'key': key,
+            'columns': roster.columns,
+            'rows': roster.rows,
+        }
+        try:
+            write_atomic(self._sidecar_path(path),
+                         lambda f: pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL), binary=True)
+        except Exception:
+            pass
@@ -0,0 +1,109 @@
+# core/roster_index.py
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .student_matcher import StudentMatcher
+
+REQUIRED_COLUMNS = ('学号', '姓名')
+
+
+def safe_str(value: Any) -> str:
+    """安全转换为字符串，NaN/None/空值统一替换为下划线"""
+    if value is None:
+        return '_'
+    try:
+        if value != value:  # NaN
+            return '_'
+    except TypeError:  # pd.NA 等无法比较的缺失值
+        return '_'
+
+    text = str(value).strip()
+    if text == '' or text == 'nan':
+        return '_'
+    return text
+
+
+def student_id_text(value: Any) -> str:
+    """学号单元格转为字符串，空值为空字符串（报告中留空，也不作为匹配模式）"""
+    text = safe_str(value)
+    return '' if text == '_' else text
+
+
+class RosterIndex:
+    """
+    花名册索引（每次读取花名册时构建一次）
+    提供 O(1) 的 姓名→行、姓名→学号、学号→姓名 查询，以及按模板渲染好的学生名称，
+    供处理器、重命名器和批量检查共用，避免反复 iterrows 和布尔掩码查询。
+    """
+
+    def __init__(self, columns: Sequence[str], rows: Iterable[Sequence[Any]]):
+        self.columns: List[str] = [str(column) for column in columns]
+        missing = [column for column in REQUIRED_COLUMNS if column not in self.columns]
+        if missing:
+            raise ValueError(f"花名册必须包含‘学号’和‘姓名’列！当前列：{', '.join(self.columns)}")
+
+        self.rows: List[tuple] = [tuple(row) for row in rows]
+        self._matcher: Optional[StudentMatcher] = None
+        self._rendered: Dict[str, Dict[Any, str]] = {}
+
+        name_pos = self.columns.index('姓名')
+        id_pos = self.columns.index('学号')
+
+        self.names: List[Any] = []
+        self.name_to_row: Dict[Any, int] = {}
+        self.name_to_id: Dict[Any, str] = {}
+        self.id_to_name: Dict[str, Any] = {}
+
+        for row_number, row in enumerate(self.rows):
+            name = row[name_pos]
+            # 空学号不作为匹配模式，以免 None/nan 被当成学号去匹配
+            student_id = student_id_text(row[id_pos])
+            self.names.append(name)
+
+            # 同名学生以第一条记录为准（与原 iloc[0] 行为一致）
+            if name not in self.name_to_row:
+                self.name_to_row[name] = row_number
+                self.name_to_id[name] = student_id
+            if student_id:
+                self.id_to_name[student_id] = name
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, name) -> bool:
+        return name in self.name_to_row
+
+    @property
+    def matcher(self) -> StudentMatcher:
+        """姓名/学号匹配器（首次使用时构建）"""
+        return self.ensure_matcher()
+
+    def ensure_matcher(self) -> StudentMatcher:
+        """构建匹配器（已构建则直接返回）；在分发给多个线程或进程之前调用，避免各自重复构建"""
+        if self._matcher is None:
+            self._matcher = StudentMatcher(self.names, self.id_to_name)
+        return self._matcher
+
+    def render_names(self, compiled) -> Dict[Any, str]:
+        """
+        按编译后的模板渲染所有学生的名称（同名取第一条；按模板缓存）
+        只转换模板中用到的列，缺失值按 safe_str 替换为下划线
+        :return: 姓名 → 名称
+        """
+        rendered = self._rendered.get(compiled.template)
+        if rendered is None:
+            positions = {column: index for index, column in enumerate(self.columns)}
+            segments = [(positions[text], None) if is_var else (None, text)
+                        for is_var, text in compiled.segments]
+            rendered = {}
+            for name, row_number in self.name_to_row.items():
+                row = self.rows[row_number]
+                rendered[name] = ''.join(safe_str(row[position]) if text is None else text
+                                         for position, text in segments)
+            self._rendered[compiled.template] = rendered
+        return rendered
+
+    def rows_for(self, names: Iterable[Any]) -> List[tuple]:
+        """按花名册顺序返回指定学生的所有行"""
+        wanted = set(names)
+        name_pos = self.columns.index('姓名')
+        return [row for row in self.rows if row[name_pos] in wanted]
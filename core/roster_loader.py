@@ -0,0 +1,206 @@
+# core/roster_loader.py
+import abc
+import csv
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .roster_index import RosterIndex
+
+# 需要按文本读取的列（如学号 00123 不能变成数字 123）
+TEXT_COLUMNS = ('学号',)
+# CSV 依次尝试的编码（Excel 另存的中文 CSV 常为 GBK）
+CSV_ENCODINGS = ('utf-8-sig', 'gb18030')
+
+
+def normalize_cell(value: Any) -> Any:
+    """空单元格/空字符串 → None，整数值的浮点数 → int（与 pandas.read_excel 一致）"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value if value.strip() else None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def make_columns(header: Sequence[Any]) -> List[str]:
+    """表头转为列名：空列名记为 'Unnamed: n'，重复列名加 '.1'、'.2' 后缀（与 pandas 一致）"""
+    columns: List[str] = []
+    seen: Dict[str, int] = {}
+    for position, value in enumerate(header):
+        value = normalize_cell(value)
+        name = f"Unnamed: {position}" if value is None else str(value).strip()
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def build_table(raw_rows: Iterator[Sequence[Any]]) -> Tuple[List[str], Iterator[tuple]]:
+    """
+    把原始行（第一行为表头）整理为 (列名, 行迭代器)
+    跳过全空行，去掉表头为空且没有数据的尾部列，学号等列统一转为文本。
+    """
+    raw_rows = iter(raw_rows)
+    header = None
+    for row in raw_rows:
+        if any(normalize_cell(value) is not None for value in row):
+            header = list(row)
+            break
+    if header is None:
+        return [], iter(())
+
+    # 去掉表头末尾的空列（只写模式/手工编辑的表格常在右侧留下空单元格）
+    while header and normalize_cell(header[-1]) is None:
+        header.pop()
+    columns = make_columns(header)
+    width = len(columns)
+    text_positions = [columns.index(column) for column in TEXT_COLUMNS if column in columns]
+
+    def rows() -> Iterator[tuple]:
+        for row in raw_rows:
+            values = [normalize_cell(value) for value in row[:width]]
+            if not any(value is not None for value in values):
+                continue
+            values.extend([None] * (width - len(values)))
+            for position in text_positions:
+                if values[position] is not None:
+                    values[position] = str(values[position]).strip()
+            yield tuple(values)
+
+    return columns, rows()
+
+
+class RosterLoader(abc.ABC):
+    """花名册读取后端：返回 (列名, 行元组迭代器)，直接交给 RosterIndex，不经过 DataFrame"""
+
+    name = ''
+    extensions: Tuple[str, ...] = ()
+
+    @abc.abstractmethod
+    def read(self, path: str) -> Tuple[List[str], Iterator[tuple]]:
+        """读取花名册文件"""
+
+
+class XlsxRosterLoader(RosterLoader):
+    """xlsx：openpyxl 只读模式逐行读取第一个工作表"""
+
+    name = 'openpyxl'
+    extensions = ('.xlsx', '.xlsm')
+
+    def read(self, path: str) -> Tuple[List[str], Iterator[tuple]]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook.worksheets[0]
+            # 部分工具生成的文件记录的表格范围不准确，按实际内容重新计算
+            worksheet.reset_dimensions()
+            columns, rows = build_table(worksheet.iter_rows(values_only=True))
+            return columns, iter(list(rows))
+        finally:
+            workbook.close()
+
+
+class XlsRosterLoader(RosterLoader):
+    """xls：xlrd 读取第一个工作表"""
+
+    name = 'xlrd'
+    extensions = ('.xls',)
+
+    def read(self, path: str) -> Tuple[List[str], Iterator[tuple]]:
+        import xlrd
+
+        workbook = xlrd.open_workbook(path, on_demand=True)
+        try:
+            sheet = workbook.sheet_by_index(0)
+
+            def cell_value(cell):
+                if cell.ctype == xlrd.XL_CELL_DATE:
+                    return xlrd.xldate.xldate_as_datetime(cell.value, workbook.datemode)
+                if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                    return bool(cell.value)
+                if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                    return None
+                return cell.value
+
+            raw_rows = ([cell_value(cell) for cell in sheet.row(index)] for index in range(sheet.nrows))
+            columns, rows = build_table(raw_rows)
+            return columns, iter(list(rows))
+        finally:
+            workbook.release_resources()
+
+
+class CsvRosterLoader(RosterLoader):
+    """CSV：所有值按文本读取"""
+
+    name = 'csv'
+    extensions = ('.csv',)
+
+    def read(self, path: str) -> Tuple[List[str], Iterator[tuple]]:
+        for encoding in CSV_ENCODINGS:
+            try:
+                with open(path, 'r', encoding=encoding, newline='') as f:
+                    columns, rows = build_table(csv.reader(f))
+                    return columns, iter(list(rows))
+            except UnicodeDecodeError:
+                continue
+        raise ValueError(f"无法识别花名册的文本编码（已尝试：{', '.join(CSV_ENCODINGS)}）")
+
+
+class PandasRosterLoader(RosterLoader):
+    """pandas.read_excel：其他格式（如 ods），或轻量后端的依赖未安装时使用"""
+
+    name = 'pandas'
+
+    def read(self, path: str) -> Tuple[List[str], Iterator[tuple]]:
+        import pandas as pd
+
+        frame = pd.read_excel(path, dtype={column: str for column in TEXT_COLUMNS})
+        frame = frame.astype(object).where(frame.notna(), None)
+        return frame.columns.tolist(), frame.itertuples(index=False, name=None)
+
+
+# 扩展名 → 读取后端（由 register_loader 填写）
+ROSTER_LOADERS: Dict[str, RosterLoader] = {}
+FALLBACK_LOADER = PandasRosterLoader()
+# 文件选择对话框中可选的花名册类型
+ROSTER_FILETYPES = ("花名册文件", "*.xlsx *.xls *.csv")
+
+
+def register_loader(loader: RosterLoader):
+    """注册（或替换）某些扩展名的读取后端"""
+    for extension in loader.extensions:
+        ROSTER_LOADERS[extension.lower()] = loader
+
+
+for _loader in (XlsxRosterLoader(), XlsRosterLoader(), CsvRosterLoader()):
+    register_loader(_loader)
+
+
+def get_loader(path: str) -> RosterLoader:
+    """按扩展名选择读取后端，没有对应后端时使用 pandas"""
+    return ROSTER_LOADERS.get(os.path.splitext(path)[1].lower(), FALLBACK_LOADER)
+
+
+def read_roster(path: str, loader: Optional[RosterLoader] = None) -> Tuple[List[str], Iterator[tuple]]:
+    """
+    读取花名册为 (列名, 行元组迭代器)
+    轻量后端依赖的库（openpyxl/xlrd）未安装时退回 pandas。
+    """
+    loader = loader or get_loader(path)
+    try:
+        return loader.read(path)
+    except ImportError:
+        if loader is FALLBACK_LOADER:
+            raise
+        return FALLBACK_LOADER.read(path)
+
+
+def load_roster_index(path: str, loader: Optional[RosterLoader] = None) -> RosterIndex:
+    """读取花名册并构建索引"""
+    columns, rows = read_roster(path, loader)
+    return RosterIndex(columns, rows)
@@ -0,0 +1,57 @@
+# core/scan_index.py
+import datetime
+import os
+from typing import Dict, List
+
+from .json_store import JsonStore, folder_key
+
+# 最多保留的文件夹条目数，超出时丢弃最久未使用的文件夹
+MAX_FOLDERS = 200
+# 条目记录格式版本，格式变化时递增以自动作废旧记录
+INDEX_VERSION = 3
+
+
+class ScanIndex(JsonStore):
+    """
+    增量扫描索引（持久化为 config/scan_index.json）
+    按文件夹记录 名称 → [索引节点号, 是否文件夹, 匹配到的学生列表]，
+    再次检查同一文件夹时只需重新匹配新增或变化的条目；校验所用的信息都来自 scandir 本身，无需逐个 stat。
+    花名册（匹配器指纹）或项目类型变化时，该文件夹的记录整体作废。
+    默认不启用：匹配本身已经很快，只有在基准测试证明有收益的场景下才值得打开。
+    """
+
+    def get_entries(self, folder: str, fingerprint: str, is_folder_project: bool) -> Dict[str, list]:
+        """获取文件夹的已缓存条目（指纹或项目类型不一致时返回空字典）"""
+        with self._lock:
+            record = self._load().get(folder_key(folder))
+            if (not record or record.get('version') != INDEX_VERSION
+                    or record.get('fingerprint') != fingerprint
+                    or record.get('is_folder') != is_folder_project):
+                return {}
+            return dict(record.get('entries', {}))
+
+    def set_entries(self, folder: str, fingerprint: str, is_folder_project: bool,
+                    entries: Dict[str, List]):
+        """更新文件夹的条目（整体替换，已删除的文件随之移除；内容没有变化时不标记为待保存）"""
+        with self._lock:
+            data = self._load()
+            key = folder_key(folder)
+            previous = data.get(key)
+            if (previous and previous.get('version') == INDEX_VERSION
+                    and previous.get('fingerprint') == fingerprint
+                    and previous.get('is_folder') == is_folder_project
+                    and previous.get('entries') == entries):
+                return
+            data[key] = {
+                'version': INDEX_VERSION,
+                'folder': os.path.abspath(folder),
+                'fingerprint': fingerprint,
+                'is_folder': is_folder_project,
+                'entries': entries,
+                'timestamp': datetime.datetime.now().isoformat(),
+            }
+            if len(data) > MAX_FOLDERS:
+                oldest = sorted(data, key=lambda key: data[key].get('timestamp', ''))
+                for key in oldest[:len(data) - MAX_FOLDERS]:
+                    del data[key]
+            self._mark_dirty()
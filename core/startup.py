@@ -0,0 +1,95 @@
+# core/startup.py
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+# 界面启动后在后台预先导入的重型模块（首次读取花名册、写报告时不必再等待）
+# 花名册和报告都已不经过 pandas，预加载它只会白白占用启动后的几百毫秒
+HEAVY_MODULES = ('numpy', 'openpyxl')
+# 导入耗时报告默认列出的模块数
+IMPORT_REPORT_TOP = 15
+# 项目根目录（gui.py、core/ 所在目录），测量导入耗时的子进程在此运行
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def warm_up(modules: Sequence[str] = HEAVY_MODULES,
+            log_callback: Optional[Callable] = None) -> threading.Thread:
+    """
+    在后台线程中预先导入重型模块
+    导入锁保证与主线程同时导入同一模块时只执行一次；未安装的可选模块直接跳过。
+    """
+    def run():
+        start = time.perf_counter()
+        loaded = []
+        for name in modules:
+            try:
+                importlib.import_module(name)
+                loaded.append(name)
+            except ImportError:
+                continue
+        if log_callback:
+            log_callback(f"预加载完成：{', '.join(loaded)}（{time.perf_counter() - start:.2f} 秒）")
+
+    thread = threading.Thread(target=run, name="import-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+class ImportTiming(NamedTuple):
+    """一条导入耗时记录（微秒，与 -X importtime 一致）"""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """解析 python -X importtime 输出到 stderr 的内容"""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        timings.append(ImportTiming(stripped, int(parts[0]), int(parts[1]),
+                                    (len(name) - len(stripped) - 1) // 2))
+    return timings
+
+
+def measure_imports(module: str = 'gui') -> List[ImportTiming]:
+    """
+    在新的解释器中以 -X importtime 导入指定模块并收集各模块耗时
+    打包后的程序无法传递 -X 选项，此时在本进程中只测量该模块整体的导入耗时。
+    """
+    if getattr(sys, 'frozen', False):
+        start = time.perf_counter()
+        importlib.import_module(module)
+        elapsed = int((time.perf_counter() - start) * 1e6)
+        return [ImportTiming(module, elapsed, elapsed, 0)]
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=PROJECT_ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败：{result.stderr.strip().splitlines()[-1:]}")
+    return parse_importtime(result.stderr)
+
+
+def format_import_report(timings: List[ImportTiming], top: int = IMPORT_REPORT_TOP) -> str:
+    """生成导入耗时摘要：总耗时、直接导入的模块、累计耗时最多的模块"""
+    if not timings:
+        return "没有导入记录"
+    total = sum(timing.cumulative_us for timing in timings if timing.depth == 0)
+    lines = [f"导入总耗时: {total / 1000:.1f} ms（共 {len(timings)} 个模块）", "", "直接导入:"]
+    for timing in sorted((t for t in timings if t.depth == 0), key=lambda t: -t.cumulative_us):
+        lines.append(f"  {timing.cumulative_us / 1000:8.1f} ms  {timing.name}")
+    lines += ["", f"累计耗时最多的 {top} 个模块:"]
+    for timing in sorted(timings, key=lambda t: -t.cumulative_us)[:top]:
+        lines.append(f"  {timing.cumulative_us / 1000:8.1f} ms  (自身 {timing.self_us / 1000:6.1f} ms)  {timing.name}")
+    return '\n'.join(lines)
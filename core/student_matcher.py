@@ -0,0 +1,132 @@
+# core/student_matcher.py
+import hashlib
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+class MatchHit(NamedTuple):
+    """一次命中：学生姓名、命中类型（name/id）、命中的模式串及其在文本中的起始位置"""
+    student: str
+    kind: str
+    pattern: str
+    start: int
+
+
+class StudentMatcher:
+    """
+    基于 Aho-Corasick 自动机的学生匹配器
+    将花名册中所有姓名和学号编译进同一个自动机，每个文件名只需线性扫描一次。
+    匹配优先级与原逻辑一致：先姓名后学号，同类按花名册顺序；
+    但被更长的命中完全覆盖的命中不计（如“张三丰.docx”只算张三丰，不算张三）。
+    """
+
+    KIND_NAME = 'name'
+    KIND_ID = 'id'
+
+    def __init__(self, names: Iterable[str], id_to_name: Dict[str, str]):
+        # 每个模式串：(学生姓名, 类型, 模式串)，列表下标即优先级
+        self._patterns = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._fingerprint: Optional[str] = None
+
+        seen = set()
+        for name in names:
+            self._add_pattern(name, name, self.KIND_NAME, seen)
+        for student_id, name in id_to_name.items():
+            self._add_pattern(student_id, name, self.KIND_ID, seen)
+
+        self._build_fail_links()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    @property
+    def fingerprint(self) -> str:
+        """匹配器指纹：模式串及其优先级不变时保持不变，用于判断缓存的匹配结果是否仍然有效"""
+        if self._fingerprint is None:
+            digest = hashlib.md5()
+            for student, kind, pattern in self._patterns:
+                digest.update(f"{student}\t{kind}\t{pattern}\n".encode('utf-8'))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def _add_pattern(self, pattern, student, kind: str, seen: set):
+        """向字典树中插入一个模式串（忽略空值和重复项）"""
+        if not isinstance(pattern, str) or not pattern or (kind, pattern) in seen:
+            return
+        seen.add((kind, pattern))
+
+        pattern_id = len(self._patterns)
+        self._patterns.append((student, kind, pattern))
+
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(pattern_id)
+
+    def _build_fail_links(self):
+        """广度优先构建失败指针，并合并输出集合"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _iter_pattern_ids(self, text: str):
+        """扫描文本，依次产出 (结束位置, 模式编号)"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                yield index, pattern_id
+
+    def find_all(self, text: str) -> List[MatchHit]:
+        """
+        返回文本中的全部命中，按优先级排序（姓名在前，同类按花名册顺序）
+        某个位置上的命中被另一个更长的命中完全覆盖时，只保留较长的那个。
+        """
+        spans = []
+        for end, pattern_id in self._iter_pattern_ids(text):
+            spans.append((end - len(self._patterns[pattern_id][2]) + 1, end, pattern_id))
+        if len(spans) > 1:
+            spans = [(start, end, pattern_id) for start, end, pattern_id in spans
+                     if not any(other_start <= start and end <= other_end
+                                and other_end - other_start > end - start
+                                for other_start, other_end, _ in spans)]
+
+        hits = []
+        for start, end, pattern_id in sorted(spans, key=lambda span: (span[2], span[1])):
+            student, kind, pattern = self._patterns[pattern_id]
+            hits.append(MatchHit(student, kind, pattern, start))
+        return hits
+
+    def match_all(self, text: str) -> List[str]:
+        """返回命中的所有不同学生（按优先级排序），用于检测歧义匹配"""
+        students = []
+        for hit in self.find_all(text):
+            if hit.student not in students:
+                students.append(hit.student)
+        return students
+
+    def match(self, text: str) -> Optional[str]:
+        """返回优先级最高的匹配学生，未命中返回 None"""
+        hits = self.find_all(text)
+        return hits[0].student if hits else None
@@ -0,0 +1,100 @@
+# core/submission_matrix.py
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+# 状态编码（int8）
+MISSING = 0
+SUBMITTED = 1
+# 渲染报告时使用的文字标签
+STATUS_LABELS = {MISSING: '未交', SUBMITTED: '已交'}
+
+
+class SubmissionMatrix:
+    """
+    学生 × 实验 的提交矩阵（int8，0=未交，1=已交）
+    学生和实验各有独立的索引；各类统计都由矩阵的向量化归约得到，
+    '已交'/'未交' 文字只在渲染报告行时才出现。
+    """
+
+    def __init__(self, students: Sequence, student_ids: Sequence[str], folders: Sequence[str]):
+        self.students: List = list(students)
+        self.student_ids: List[str] = list(student_ids)
+        self.folders: List[str] = list(folders)
+        self.student_index: Dict = {name: row for row, name in enumerate(self.students)}
+        self.folder_index: Dict[str, int] = {folder: column for column, folder in enumerate(self.folders)}
+        self.status = np.zeros((len(self.students), len(self.folders)), dtype=np.int8)
+
+    @classmethod
+    def from_roster(cls, roster, folders: Sequence[str]) -> 'SubmissionMatrix':
+        """按花名册建立矩阵（同名学生只保留一行，学号取第一条记录）"""
+        students = list(dict.fromkeys(roster.names))
+        return cls(students, [roster.name_to_id[name] for name in students], folders)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.status.shape
+
+    def mark_submitted(self, folder: str, students: Iterable):
+        """把某个实验中已提交的学生标记为已交（不在花名册中的名字忽略）"""
+        rows = [self.student_index[name] for name in students if name in self.student_index]
+        if rows:
+            self.status[rows, self.folder_index[folder]] = SUBMITTED
+
+    # --- 向量化统计 ---
+    @property
+    def submitted(self) -> np.ndarray:
+        """布尔矩阵：是否已交"""
+        return self.status == SUBMITTED
+
+    @property
+    def total_submissions(self) -> int:
+        return int(np.count_nonzero(self.status == SUBMITTED))
+
+    @property
+    def overall_rate(self) -> float:
+        """总提交率（0~1）"""
+        return float(self.submitted.mean()) if self.status.size else 0.0
+
+    def student_counts(self) -> np.ndarray:
+        """每个学生的已交次数"""
+        return self.submitted.sum(axis=1)
+
+    def student_rates(self) -> np.ndarray:
+        """每个学生的提交率（0~1）"""
+        if not self.folders:
+            return np.zeros(len(self.students))
+        return self.submitted.mean(axis=1)
+
+    def lab_counts(self) -> np.ndarray:
+        """每个实验的已交人数"""
+        return self.submitted.sum(axis=0)
+
+    def lab_rates(self) -> np.ndarray:
+        """每个实验的提交率（0~1）"""
+        if not self.students:
+            return np.zeros(len(self.folders))
+        return self.submitted.mean(axis=0)
+
+    def missing_streaks(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        连续未交次数（按实验顺序）
+        :return: (每个学生最长的连续未交次数, 截至最后一个实验的连续未交次数)
+        """
+        rows, columns = self.status.shape
+        if columns == 0:
+            empty = np.zeros(rows, dtype=np.int64)
+            return empty, empty
+        positions = np.arange(columns)
+        # 每个位置之前（含）最近一次已交的位置，没有则为 -1；两者之差即以该位置结尾的连续未交长度
+        last_submitted = np.where(self.submitted, positions, -1)
+        np.maximum.accumulate(last_submitted, axis=1, out=last_submitted)
+        run_lengths = positions - last_submitted
+        return run_lengths.max(axis=1), run_lengths[:, -1]
+
+    # --- 渲染 ---
+    def rows(self, labels: Dict[int, str] = STATUS_LABELS) -> Iterator[list]:
+        """逐行产出报告行 [学号, 姓名, 状态文字...]"""
+        lookup = np.array([labels[MISSING], labels[SUBMITTED]], dtype=object)
+        for student_id, name, statuses in zip(self.student_ids, self.students, self.status):
+            yield [student_id, name] + lookup[statuses].tolist()
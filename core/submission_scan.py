@@ -0,0 +1,131 @@
+# core/submission_scan.py
+import fnmatch
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .dir_scan import DirEntryInfo, DirSnapshot, scan_dir
+from .instrumentation import NullInstrumentation
+from .student_matcher import StudentMatcher
+from .task_runner import check_cancelled
+
+
+# 递归查找时默认忽略的条目（系统文件、压缩包解压残留、Office 临时文件）
+DEFAULT_IGNORE_GLOBS = ('.*', '__MACOSX', '~$*', 'Thumbs.db', 'desktop.ini')
+
+
+class MatchRecord(NamedTuple):
+    """
+    一条匹配记录：目录条目、匹配到的学生（优先级最高的候选）、全部候选学生
+    relpath 为相对作业文件夹的路径（仅递归查找到的深层条目才有）
+    """
+    entry: DirEntryInfo
+    student: str
+    candidates: Tuple[str, ...]
+    relpath: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.relpath or self.entry.name
+
+    @property
+    def is_nested(self) -> bool:
+        return self.relpath is not None
+
+    @property
+    def is_ambiguous(self) -> bool:
+        return len(self.candidates) > 1
+
+
+def scan_submissions(snapshot: DirSnapshot, matcher: StudentMatcher, is_folder_project: bool,
+                     cancel_event: Optional[threading.Event] = None,
+                     cached: Optional[Dict[str, list]] = None,
+                     fresh: Optional[Dict[str, list]] = None) -> List[MatchRecord]:
+    """
+    对目录快照做一次匹配，得到所有命中学生的条目
+    文件夹项目只看子文件夹，文件项目只看文件（排除 ~$ 临时文件）。
+    未交名单、重复提交名单和重命名计划都基于这份记录，不再各自列目录和匹配。
+    :param cached: 上次扫描的结果 {名称: [索引节点号, 是否文件夹, 候选学生]}，未变化的条目直接复用
+                   （索引节点号和类型都来自 scandir，不需要额外 stat）
+    :param fresh: 传入字典时写入本次扫描的全部条目（含未匹配的），供下次增量扫描使用
+    """
+    records = []
+    entries = snapshot.dirs() if is_folder_project else snapshot.files()
+    for entry in entries:
+        check_cancelled(cancel_event)
+
+        candidates = None
+        if cached is not None or fresh is not None:
+            inode, is_dir = entry.inode, entry.is_dir
+            previous = cached.get(entry.name) if cached else None
+            if previous and previous[0] == inode and previous[1] == is_dir:
+                candidates = previous[2]
+        if candidates is None:
+            candidates = matcher.match_all(entry.name)
+        if fresh is not None:
+            fresh[entry.name] = [inode, is_dir, list(candidates)]
+
+        if candidates:
+            records.append(MatchRecord(entry, candidates[0], tuple(candidates)))
+    return records
+
+
+def discover_submissions(root: str, matcher: StudentMatcher, max_depth: int,
+                         ignore_globs: Optional[Sequence[str]] = None,
+                         cancel_event: Optional[threading.Event] = None,
+                         is_folder_project: bool = False,
+                         instrumentation: Optional[NullInstrumentation] = None) -> List[MatchRecord]:
+    """
+    递归查找提交（用于 班级/姓名/作业.docx 这类嵌套结构）
+    第一层的取舍与 scan_submissions 相同：文件夹项目只匹配子文件夹，文件项目只匹配文件（排除 ~$ 临时文件），
+    . 开头的条目同样参与匹配，默认忽略列表只决定未匹配的文件夹是否深入；
+    更深的层级中文件和文件夹都参与匹配。某个文件夹一旦匹配到学生，整棵子树视为该学生的提交，不再深入遍历。
+    :param max_depth: 最多深入的子目录层数（0 只看作业文件夹本身的条目）
+    :param ignore_globs: 在 DEFAULT_IGNORE_GLOBS 之外额外忽略的名称或相对路径通配符（路径用 / 分隔）
+    :param instrumentation: 分阶段计时与计数（每一层目录都计入列目录）
+    """
+    extra_patterns = tuple(ignore_globs or ())
+    patterns = DEFAULT_IGNORE_GLOBS + extra_patterns
+
+    def ignored(name: str, relpath: str, patterns: Sequence[str] = patterns) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relpath, pattern) for pattern in patterns)
+
+    def top_level_candidate(entry: DirEntryInfo) -> bool:
+        return entry.is_dir if is_folder_project else not entry.is_dir and not entry.is_temp_file
+
+    records = []
+    stack = [(root, '', 0)]
+    while stack:
+        check_cancelled(cancel_event)
+        path, prefix, depth = stack.pop()
+        try:
+            snapshot = scan_dir(path, instrumentation=instrumentation)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in snapshot:
+            relpath = prefix + entry.name
+            if depth == 0:
+                if ignored(entry.name, relpath, extra_patterns):
+                    continue
+                candidates = matcher.match_all(entry.name) if top_level_candidate(entry) else None
+                descend = not ignored(entry.name, relpath, DEFAULT_IGNORE_GLOBS)
+            else:
+                if ignored(entry.name, relpath):
+                    continue
+                candidates = matcher.match_all(entry.name)
+                descend = True
+            if candidates:
+                records.append(MatchRecord(entry, candidates[0], tuple(candidates), relpath if prefix else None))
+            elif entry.is_dir and depth < max_depth and descend:
+                subdirs.append((entry.path, relpath + '/', depth + 1))
+        # 逆序入栈，使遍历顺序与目录列表顺序一致
+        stack.extend(reversed(subdirs))
+    return records
+
+
+def group_by_student(records: List[MatchRecord]) -> Dict[str, List[str]]:
+    """按学生汇总提交的条目名称"""
+    submitted_files: Dict[str, List[str]] = {}
+    for record in records:
+        submitted_files.setdefault(record.student, []).append(record.name)
+    return submitted_files
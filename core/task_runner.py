@@ -0,0 +1,82 @@
+# core/task_runner.py
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class TaskCancelled(Exception):
+    """任务被用户取消"""
+
+
+def check_cancelled(cancel_event: Optional[threading.Event]):
+    """检查取消标记，已取消时抛出 TaskCancelled"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise TaskCancelled("任务已取消")
+
+
+class BackgroundTask:
+    """
+    后台任务：在工作线程中执行处理函数
+    处理过程中的日志和进度记录写入线程安全队列，由界面线程定时批量取出，
+    避免每条日志都强制刷新界面。
+    """
+
+    LOG = 'log'
+    PROGRESS = 'progress'
+
+    def __init__(self, target: Callable, kwargs: Optional[Dict[str, Any]] = None):
+        self.target = target
+        self.kwargs = dict(kwargs or {})
+        self.records: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'BackgroundTask':
+        """启动工作线程，自动注入 log_callback / progress_callback / cancel_event"""
+        self.kwargs.setdefault('log_callback', self.log)
+        self.kwargs.setdefault('progress_callback', self.report_progress)
+        self.kwargs.setdefault('cancel_event', self.cancel_event)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.result = self.target(**self.kwargs)
+        except BaseException as e:  # 交给界面线程处理
+            self.error = e
+
+    def log(self, message: str):
+        """记录日志（可在任意线程调用）"""
+        self.records.put((self.LOG, message))
+
+    def report_progress(self, done: int, total: int):
+        """记录进度（可在任意线程调用）"""
+        self.records.put((self.PROGRESS, (done, total)))
+
+    def cancel(self):
+        """请求取消，处理函数会在下一个检查点抛出 TaskCancelled"""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def is_finished(self) -> bool:
+        """线程已结束且队列中的记录已全部取出"""
+        return self._thread is not None and not self._thread.is_alive() and self.records.empty()
+
+    def drain(self, max_items: int = 500) -> List[Tuple[str, Any]]:
+        """批量取出队列中的记录"""
+        items = []
+        try:
+            while len(items) < max_items:
+                items.append(self.records.get_nowait())
+        except queue.Empty:
+            pass
+        return items
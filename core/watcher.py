@@ -0,0 +1,276 @@
+# core/watcher.py
+import os
+import threading
+from typing import Callable, Dict, Optional, Sequence, Set
+
+from .dir_scan import scan_dir
+from .submission_scan import discover_submissions, scan_submissions
+
+try:  # 可选依赖：安装 watchdog 后使用系统文件事件（inotify 等），否则轮询
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+class HomeworkWatcher:
+    """
+    监视模式：持续跟踪作业文件夹，实时维护已交/未交名单
+    启动时完整扫描一次，之后每个新增、删除或改名的条目只做一次匹配；
+    名单变化后经过防抖延迟再重写 未交作业名单_*（默认 xlsx）。
+    max_depth > 0 时（嵌套结构）无法按单个条目增量维护，子树中有变化时经防抖后用 discover_submissions 重新扫描。
+    """
+
+    def __init__(self, processor, roster_path: str, homework_dir: str, output_dir: str,
+                 is_folder_project: bool = False, debounce_seconds: float = 2.0,
+                 poll_interval: float = 1.0, log_callback: Optional[Callable] = None,
+                 report_format: Optional[str] = None, max_depth: int = 0,
+                 ignore_globs: Optional[Sequence[str]] = None):
+        self.processor = processor
+        self.roster_path = roster_path
+        self.homework_dir = os.path.abspath(homework_dir)
+        self.output_dir = output_dir
+        self.is_folder_project = is_folder_project
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.log_callback = log_callback
+        self.report_format = report_format
+        self.max_depth = max_depth
+        self.ignore_globs = ignore_globs
+
+        self.roster = None
+        self.entry_owner: Dict[str, str] = {}       # 条目名称 → 学生
+        self.submitted: Dict[str, Set[str]] = {}    # 学生 → 条目名称集合
+
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._observer = None
+        self._poll_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # --- 生命周期 ---
+    def start(self) -> 'HomeworkWatcher':
+        """完整扫描一次并开始监视"""
+        self.roster = self.processor.load_roster(self.roster_path)
+        snapshot = scan_dir(self.homework_dir)
+        if self.is_nested:
+            self._rescan()
+        else:
+            with self._lock:
+                for record in scan_submissions(snapshot, self.roster.matcher, self.is_folder_project):
+                    self._add_entry(record.name, record.student)
+        self._log(f"👀 开始监视: {self.homework_dir}（已交 {len(self.submitted)} 人）")
+        self.write_report()
+
+        self._stop_event.clear()
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_WatchdogHandler(self), self.homework_dir, recursive=self.is_nested)
+            self._observer.start()
+        else:
+            self._poll_thread = threading.Thread(target=self._poll_loop, args=(set(snapshot.names),),
+                                                 daemon=True)
+            self._poll_thread.start()
+        return self
+
+    @property
+    def is_nested(self) -> bool:
+        """是否递归查找提交（此时子树中的任何变化都触发重新扫描）"""
+        return self.max_depth > 0
+
+    def stop(self):
+        """停止监视，若有待写入的报告则立即写出"""
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._poll_thread is not None:
+            self._poll_thread.join()
+            self._poll_thread = None
+
+        with self._lock:
+            pending = self._timer is not None
+            if pending:
+                self._timer.cancel()
+                self._timer = None
+        if pending:
+            if self.is_nested:
+                self._refresh()
+            else:
+                self.write_report()
+        self._log("监视已停止。")
+
+    @property
+    def missing_students(self) -> Set[str]:
+        with self._lock:
+            return set(self.roster.names) - set(self.submitted)
+
+    # --- 增量更新 ---
+    def on_created(self, name: str, is_dir: bool):
+        if not self._is_relevant(name, is_dir):
+            return
+        student = self.roster.matcher.match(name)
+        if student is None:
+            return
+        with self._lock:
+            is_new = student not in self.submitted
+            self._add_entry(name, student)
+        self._log(f"新提交: {name} → {student}" + ("" if is_new else "（重复提交）"))
+        if is_new:
+            self._schedule_report()
+
+    def on_deleted(self, name: str):
+        with self._lock:
+            student = self.entry_owner.pop(name, None)
+            if student is None:
+                return
+            entries = self.submitted.get(student, set())
+            entries.discard(name)
+            now_missing = not entries
+            if now_missing:
+                self.submitted.pop(student, None)
+        if now_missing:
+            self._log(f"提交被移除: {name}（{student} 变为未交）")
+            self._schedule_report()
+
+    def on_moved(self, old_name: str, new_name: str, is_dir: bool):
+        self.on_deleted(old_name)
+        self.on_created(new_name, is_dir)
+
+    def on_tree_changed(self):
+        """嵌套结构中有条目变化：防抖后重新扫描"""
+        self._schedule_report(self._flush_rescan)
+
+    def _rescan(self) -> bool:
+        """
+        用 discover_submissions 重新扫描整棵子树
+        :return: 已交学生是否有变化
+        """
+        records = discover_submissions(self.homework_dir, self.roster.matcher, self.max_depth,
+                                       self.ignore_globs, is_folder_project=self.is_folder_project)
+        with self._lock:
+            before = set(self.submitted)
+            self.entry_owner = {}
+            self.submitted = {}
+            for record in records:
+                self._add_entry(record.name, record.student)
+            return set(self.submitted) != before
+
+    def _add_entry(self, name: str, student: str):
+        self.entry_owner[name] = student
+        self.submitted.setdefault(student, set()).add(name)
+
+    def _is_relevant(self, name: str, is_dir: bool) -> bool:
+        if self.is_folder_project:
+            return is_dir
+        return not is_dir and not name.startswith('~$')
+
+    # --- 报告 ---
+    def _schedule_report(self, action: Optional[Callable] = None):
+        """防抖：名单变化后延迟写报告（或重新扫描），期间的新变化会重新计时"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_seconds, action or self._flush_report)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_report(self):
+        with self._lock:
+            self._timer = None
+        self.write_report()
+
+    def _flush_rescan(self):
+        with self._lock:
+            self._timer = None
+        self._refresh()
+
+    def _refresh(self):
+        """重新扫描，已交名单有变化时重写报告"""
+        try:
+            changed = self._rescan()
+        except OSError as e:
+            self._log(f"重新扫描失败：{str(e)}")
+            return
+        if changed:
+            self._log(f"名单已更新（已交 {len(self.submitted)} 人）")
+            self.write_report()
+
+    def write_report(self):
+        """重写未交作业名单"""
+        with self._lock:
+            submitted_files = {student: sorted(entries) for student, entries in self.submitted.items()}
+        try:
+            self.processor.write_missing_students(
+                self.roster, submitted_files, self.homework_dir, self.output_dir, self.log_callback,
+                self.report_format
+            )
+        except Exception as e:
+            self._log(f"写入未交报告失败：{str(e)}")
+
+    # --- 轮询（未安装 watchdog 时） ---
+    def _poll_loop(self, known_names: Set[str]):
+        if self.is_nested:
+            # 嵌套结构：每次轮询都重新扫描整棵子树
+            while not self._stop_event.wait(self.poll_interval):
+                self._refresh()
+            return
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                snapshot = scan_dir(self.homework_dir)
+            except OSError:
+                continue
+            current = set(snapshot.names)
+            for name in known_names - current:
+                self.on_deleted(name)
+            for name in current - known_names:
+                self.on_created(name, snapshot.get(name).is_dir)
+            known_names = current
+
+    def _log(self, message: str):
+        self.processor._log(message, self.log_callback)
+
+
+class _WatchdogHandler(FileSystemEventHandler):
+    """把 watchdog 事件转换为条目名称交给 HomeworkWatcher"""
+
+    def __init__(self, watcher: HomeworkWatcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def _name(self, path: str) -> Optional[str]:
+        # 只关心作业文件夹的直接子条目
+        if os.path.dirname(os.path.abspath(path)) != self.watcher.homework_dir:
+            return None
+        return os.path.basename(path)
+
+    def on_created(self, event):
+        if self.watcher.is_nested:
+            self.watcher.on_tree_changed()
+            return
+        name = self._name(event.src_path)
+        if name:
+            self.watcher.on_created(name, event.is_directory)
+
+    def on_deleted(self, event):
+        if self.watcher.is_nested:
+            self.watcher.on_tree_changed()
+            return
+        name = self._name(event.src_path)
+        if name:
+            self.watcher.on_deleted(name)
+
+    def on_moved(self, event):
+        if self.watcher.is_nested:
+            self.watcher.on_tree_changed()
+            return
+        old_name = self._name(event.src_path)
+        new_name = self._name(event.dest_path)
+        if old_name and new_name:
+            self.watcher.on_moved(old_name, new_name, event.is_directory)
+        elif old_name:
+            self.watcher.on_deleted(old_name)
+        elif new_name:
+            self.watcher.on_created(new_name, event.is_directory)
@@ -0,0 +1,72 @@
+# core/xlsx_writer.py
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# 列宽上限（与原报告一致：最长内容 + 2，不超过 30）
+MAX_COLUMN_WIDTH = 30
+
+
+def fit_width(values: Iterable[Any], max_width: int = MAX_COLUMN_WIDTH) -> int:
+    """根据数据本身计算列宽（不需要先生成单元格对象）"""
+    longest = max((len(str(value)) for value in values), default=0)
+    return min(longest + 2, max_width)
+
+
+def write_xlsx_sheets(path: str, sheets: List[Dict[str, Any]]) -> List[int]:
+    """
+    以 openpyxl 只写模式流式写出多个工作表
+    样式在写入时直接附加到单元格上，不再事后遍历整张表；内存占用不随行数增长。
+    :param sheets: 每项为一个工作表的参数字典：
+                   sheet_name, columns,
+                   rows（行迭代器，可以是生成器，只遍历一次）,
+                   widths（各列宽度，建议用 fit_width 从数据计算；None 则使用默认宽度）,
+                   freeze_panes（冻结位置，如 'C2'）,
+                   highlight（单元格值 → 填充颜色 ARGB，如 {'未交': 'FFFF9999'}）,
+                   highlight_from（从第几列（0 起）开始应用 highlight）
+    :return: 各工作表写入的数据行数
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    counts = [_write_sheet(workbook, **sheet) for sheet in sheets]
+    workbook.save(path)
+    return counts
+
+
+def _write_sheet(workbook, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                 sheet_name: str = 'Sheet1', widths: Optional[Sequence[int]] = None,
+                 freeze_panes: Optional[str] = None,
+                 highlight: Optional[Dict[Any, str]] = None, highlight_from: int = 0) -> int:
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import PatternFill
+    from openpyxl.utils import get_column_letter
+
+    worksheet = workbook.create_sheet(sheet_name)
+
+    # 只写模式下列宽与冻结窗格必须在写入任何行之前设置
+    for index, width in enumerate(widths or []):
+        worksheet.column_dimensions[get_column_letter(index + 1)].width = width
+    if freeze_panes:
+        worksheet.freeze_panes = freeze_panes
+
+    # 每种颜色只创建一个填充对象，由所有单元格共享
+    fills = {value: PatternFill(start_color=color, end_color=color, fill_type='solid')
+             for value, color in (highlight or {}).items()}
+
+    worksheet.append(list(columns))
+    count = 0
+    for row in rows:
+        if fills:
+            cells: List[Any] = list(row[:highlight_from])
+            for value in row[highlight_from:]:
+                fill = fills.get(value)
+                if fill is None:
+                    cells.append(value)
+                else:
+                    cell = WriteOnlyCell(worksheet, value=value)
+                    cell.fill = fill
+                    cells.append(cell)
+            worksheet.append(cells)
+        else:
+            worksheet.append(list(row))
+        count += 1
+    return count
@@ -3,9 +3,24 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import pandas as pd
+import queue
 from core.processor import HomeworkProcessor
 from core.config_manager import ConfigManager
+from core.dir_scan import list_subfolders
+from core.instrumentation import Instrumentation
+from core.name_template import TemplateError, compile_template
+from core.roster_loader import ROSTER_FILETYPES
+from core.rename_plan import STATUS_NOOP, STATUS_RENAME
+from core.task_runner import BackgroundTask, TaskCancelled
+from core.watcher import HomeworkWatcher
+
+# 界面线程每次从后台任务队列中取出日志的周期（毫秒）和单次最大条数
+LOG_PUMP_INTERVAL_MS = 50
+LOG_PUMP_BATCH_SIZE = 500
+# 批量检查时并发扫描、重命名子文件夹的线程数
+BATCH_WORKERS = 4
+# 界面中可选的最大递归查找层数
+MAX_DISCOVERY_DEPTH = 5
 
 
 class HomeworkCheckerApp:
@@ -16,9 +31,13 @@ class HomeworkCheckerApp:
 
         self.processor = HomeworkProcessor()
         self.config_manager = ConfigManager()
+        self.current_task = None  # 当前正在后台执行的任务
+        self.watcher = None  # 实时监视器（监视模式开启时）
+        self.watch_log_queue = queue.Queue()
 
         self.setup_ui()
         self.load_config()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def setup_ui(self):
         # 创建主框架
@@ -61,6 +80,20 @@ class HomeworkCheckerApp:
         self.format_combo.bind('<<ComboboxSelected>>', self.on_format_selected)
 
         ttk.Button(format_frame, text="管理格式", command=self.manage_formats).grid(row=0, column=1)
+        # 比对文件内容：标记内容完全相同的重复提交，以及不同学生之间的相同文件
+        self.content_hash_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(format_frame, text="比对文件内容", variable=self.content_hash_var).grid(row=0, column=2, padx=(5, 0))
+        # 递归层数：大于 0 时在子目录中查找提交（如 班级/姓名/作业.docx）
+        ttk.Label(format_frame, text="子目录层数:").grid(row=0, column=3, padx=(10, 2))
+        self.depth_var = tk.IntVar(value=0)
+        ttk.Spinbox(format_frame, from_=0, to=MAX_DISCOVERY_DEPTH, width=3, textvariable=self.depth_var,
+                    state="readonly").grid(row=0, column=4)
+        # 耗时统计：任务结束后在日志中列出各阶段耗时与计数
+        self.stats_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(format_frame, text="耗时统计", variable=self.stats_var).grid(row=0, column=5, padx=(10, 0))
+        # 增量扫描：反复检查同一文件夹时复用上次的匹配结果（索引保存在配置目录中）
+        self.scan_index_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(format_frame, text="增量扫描", variable=self.scan_index_var).grid(row=0, column=6, padx=(10, 0))
 
         # 操作按钮框架
         button_frame = ttk.Frame(main_frame)
@@ -68,13 +101,23 @@ class HomeworkCheckerApp:
 
         ttk.Button(button_frame, text="开始检查", command=self.start_check).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="仅重命名文件", command=self.rename_only).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="预览重命名", command=self.preview_rename).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="撤销上次重命名", command=self.undo_rename).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="保存配置", command=self.save_config).pack(side=tk.LEFT, padx=5)
         # 添加【快速配置新花名册】按钮
         ttk.Button(button_frame, text="快速配置新花名册", command=self.quick_setup).pack(side=tk.LEFT, padx=5)
+        self.watch_button = ttk.Button(button_frame, text="实时监视", command=self.toggle_watch)
+        self.watch_button.pack(side=tk.LEFT, padx=5)
 
-        # 进度条
-        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
+        # 进度条与取消按钮
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
+        progress_frame.columnconfigure(0, weight=1)
+
+        self.progress = ttk.Progressbar(progress_frame, mode='determinate', maximum=100)
+        self.progress.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.cancel_button = ttk.Button(progress_frame, text="取消", command=self.cancel_task, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=1, padx=(5, 0))
 
         # 日志文本框
         ttk.Label(main_frame, text="处理日志:").grid(row=6, column=0, sticky=tk.W, pady=(10, 0))
@@ -145,7 +188,7 @@ class HomeworkCheckerApp:
     def browse_roster(self):
         filename = filedialog.askopenfilename(
             title="选择花名册文件",
-            filetypes=[("Excel files", "*.xls *.xlsx"), ("All files", "*.*")]
+            filetypes=[ROSTER_FILETYPES, ("All files", "*.*")]
         )
         if filename:
             self.roster_var.set(filename)
@@ -187,65 +230,234 @@ class HomeworkCheckerApp:
         if not self.validate_inputs():
             return
 
-        self.progress.start()
-        self.log("开始检查作业...")
-
-        try:
-            # 获取选中的格式配置
-            format_name = self.format_var.get()
-            format_config = self.config_manager.get_format_config(format_name)
-
-            if not format_config:
-                messagebox.showerror("错误", "请选择有效的重命名格式")
-                return
+        # 获取选中的格式配置
+        format_name = self.format_var.get()
+        format_config = self.config_manager.get_format_config(format_name)
 
-            self.processor.process_homework(
-                roster_path=self.roster_var.get(),
-                homework_dir=self.homework_var.get(),
-                output_dir=self.output_var.get(),
-                rename_format=format_config,
-                log_callback=self.log
-            )
+        if not format_config:
+            messagebox.showerror("错误", "请选择有效的重命名格式")
+            return
 
+        def on_success(_):
             self.log("处理完成！")
             messagebox.showinfo("完成", "作业检查处理完成！")
 
-        except Exception as e:
+        def on_error(e):
             self.log(f"处理失败: {str(e)}")
             messagebox.showerror("错误", f"处理失败: {str(e)}")
-        finally:
-            self.progress.stop()
+
+        self.log("开始检查作业...")
+        self.run_task(self.processor.process_homework, {
+            'roster_path': self.roster_var.get(),
+            'homework_dir': self.homework_var.get(),
+            'output_dir': self.output_var.get(),
+            'rename_format': format_config,
+            'content_hash': self.content_hash_var.get(),
+            'max_depth': self.depth_var.get(),
+        }, on_success, on_error)
 
     def rename_only(self):
         if not self.validate_inputs():
             return
 
-        self.progress.start()
+        format_name = self.format_var.get()
+        format_config = self.config_manager.get_format_config(format_name)
+
+        if not format_config:
+            messagebox.showerror("错误", "请选择有效的重命名格式")
+            return
+
+        def on_success(count):
+            self.log(f"重命名完成，共处理 {count} 个文件")
+            messagebox.showinfo("完成", f"文件重命名完成！共处理 {count} 个文件")
+
+        def on_error(e):
+            self.log(f"重命名失败: {str(e)}")
+            messagebox.showerror("错误", f"重命名失败: {str(e)}")
+
         self.log("开始重命名文件...")
+        self.run_task(self.processor.rename_files_only, {
+            'roster_path': self.roster_var.get(),
+            'homework_dir': self.homework_var.get(),
+            'rename_format': format_config,
+        }, on_success, on_error)
 
-        try:
-            format_name = self.format_var.get()
-            format_config = self.config_manager.get_format_config(format_name)
+    def preview_rename(self):
+        if not self.validate_inputs():
+            return
 
-            if not format_config:
-                messagebox.showerror("错误", "请选择有效的重命名格式")
+        format_config = self.config_manager.get_format_config(self.format_var.get())
+        if not format_config:
+            messagebox.showerror("错误", "请选择有效的重命名格式")
+            return
+
+        def on_success(plan):
+            if plan is None:
+                messagebox.showerror("错误", "作业文件夹不存在")
                 return
+            RenamePreviewWindow(tk.Toplevel(self.root), plan)
 
-            count = self.processor.rename_files_only(
-                roster_path=self.roster_var.get(),
-                homework_dir=self.homework_var.get(),
-                rename_format=format_config,
-                log_callback=self.log
-            )
+        def on_error(e):
+            self.log(f"预览失败: {str(e)}")
+            messagebox.showerror("错误", f"预览失败: {str(e)}")
 
-            self.log(f"重命名完成，共处理 {count} 个文件")
-            messagebox.showinfo("完成", f"文件重命名完成！共处理 {count} 个文件")
+        self.log("正在生成重命名预览...")
+        self.run_task(self.processor.preview_rename, {
+            'roster_path': self.roster_var.get(),
+            'homework_dir': self.homework_var.get(),
+            'rename_format': format_config,
+        }, on_success, on_error)
 
+    def undo_rename(self):
+        homework_dir = self.homework_var.get()
+        if not homework_dir:
+            messagebox.showerror("错误", "请选择作业文件夹")
+            return
+        if not messagebox.askyesno("确认", f"撤销该文件夹最近一次重命名？\n{homework_dir}"):
+            return
+
+        def on_success(count):
+            messagebox.showinfo("完成", f"撤销完成！共恢复 {count} 个名称")
+
+        def on_error(e):
+            messagebox.showerror("错误", f"撤销失败: {str(e)}")
+
+        self.run_task(self.processor.undo_last_rename, {
+            'homework_dir': homework_dir,
+        }, on_success, on_error)
+
+    def run_task(self, target, kwargs, on_success, on_error) -> bool:
+        """
+        在后台线程中执行耗时操作，界面线程只负责批量刷新日志和进度
+        :return: 是否已启动（已有任务在执行时返回 False）
+        """
+        if self.current_task and self.current_task.is_running():
+            messagebox.showwarning("提示", "已有任务正在执行，请等待完成或先取消。")
+            return False
+
+        self.progress.configure(value=0)
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.processor.set_instrumentation(Instrumentation() if self.stats_var.get() else None)
+        self.processor.set_scan_index(self.scan_index_var.get())
+        self.current_task = BackgroundTask(target, kwargs).start()
+        self.root.after(LOG_PUMP_INTERVAL_MS, self._pump_task, self.current_task, on_success, on_error)
+        return True
+
+    def _pump_task(self, task, on_success, on_error):
+        """批量取出后台任务的日志和进度，任务结束后回调"""
+        records = task.drain(LOG_PUMP_BATCH_SIZE)
+        messages = [payload for kind, payload in records if kind == BackgroundTask.LOG]
+        if messages:
+            self.log("\n".join(messages))
+
+        progress = [payload for kind, payload in records if kind == BackgroundTask.PROGRESS]
+        if progress:
+            done, total = progress[-1]
+            self.progress.configure(value=done * 100 / total if total else 0)
+
+        if not task.is_finished():
+            self.root.after(LOG_PUMP_INTERVAL_MS, self._pump_task, task, on_success, on_error)
+            return
+
+        self.cancel_button.configure(state=tk.DISABLED)
+        self._log_instrumentation()
+        if isinstance(task.error, TaskCancelled):
+            self.progress.configure(value=0)
+            self.log("操作已取消。")
+        elif task.error is not None:
+            on_error(task.error)
+        else:
+            self.progress.configure(value=100)
+            on_success(task.result)
+
+    def _log_instrumentation(self):
+        """任务结束后在日志中显示耗时统计，并关闭统计"""
+        instrumentation = self.processor.instrumentation
+        if instrumentation.enabled:
+            instrumentation.finish()
+            self.log("\n".join(instrumentation.format_summary()))
+        self.processor.set_instrumentation(None)
+
+    def cancel_task(self):
+        """请求取消当前后台任务"""
+        if self.current_task and self.current_task.is_running():
+            self.current_task.cancel()
+            self.cancel_button.configure(state=tk.DISABLED)
+            self.log("正在取消，请稍候...")
+
+    def toggle_watch(self):
+        """开启/关闭监视模式：新文件到达时增量更新未交名单"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+            self.watch_button.configure(text="实时监视")
+            return
+
+        if not self.roster_var.get() or not self.homework_var.get() or not self.output_var.get():
+            messagebox.showerror("错误", "请先选择花名册文件、作业文件夹和输出目录")
+            return
+
+        format_config = self.config_manager.get_format_config(self.format_var.get()) or {}
+        watcher = HomeworkWatcher(
+            self.processor,
+            roster_path=self.roster_var.get(),
+            homework_dir=self.homework_var.get(),
+            output_dir=self.output_var.get(),
+            is_folder_project=format_config.get('is_folder', False),
+            log_callback=self.watch_log_queue.put,
+            max_depth=self.depth_var.get()
+        )
+
+        def on_success(started):
+            self.watch_button.configure(state=tk.NORMAL)
+            if started is not None:
+                self.watcher = started
+                self.watch_button.configure(text="停止监视")
+            self._pump_watch_log()
+
+        def on_error(e):
+            self.watch_button.configure(state=tk.NORMAL)
+            self._pump_watch_log()
+            messagebox.showerror("错误", f"启动监视失败: {str(e)}")
+
+        # 首次完整扫描和写报告可能较慢，放到后台执行，期间禁用按钮
+        self.watch_button.configure(state=tk.DISABLED)
+        if not self.run_task(self._start_watcher, {'watcher': watcher}, on_success, on_error):
+            self.watch_button.configure(state=tk.NORMAL)
+
+    @staticmethod
+    def _start_watcher(watcher, log_callback=None, progress_callback=None, cancel_event=None):
+        """后台任务：启动监视器；启动期间点了取消则随即停止并返回 None"""
+        watcher.start()
+        if cancel_event is not None and cancel_event.is_set():
+            watcher.stop()
+            return None
+        return watcher
+
+    def _pump_watch_log(self):
+        """批量转发监视线程的日志"""
+        messages = []
+        try:
+            while len(messages) < LOG_PUMP_BATCH_SIZE:
+                messages.append(self.watch_log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if messages:
+            self.log("\n".join(messages))
+
+        if self.watcher is not None or not self.watch_log_queue.empty():
+            self.root.after(LOG_PUMP_INTERVAL_MS, self._pump_watch_log)
+
+    def on_close(self):
+        """关闭窗口前停止监视，确保待写入的报告落盘"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        try:
+            self.config_manager.flush()
         except Exception as e:
-            self.log(f"重命名失败: {str(e)}")
-            messagebox.showerror("错误", f"重命名失败: {str(e)}")
-        finally:
-            self.progress.stop()
+            print(str(e))
+        self.root.destroy()
 
     def browse_batch_parent(self):
         """浏览选择母文件夹"""
@@ -261,12 +473,8 @@ class HomeworkCheckerApp:
             return
 
         # 获取母文件夹下的所有子文件夹
-        all_subfolders = []
         try:
-            for item in os.listdir(parent_dir):
-                item_path = os.path.join(parent_dir, item)
-                if os.path.isdir(item_path) and not item.startswith('.'):
-                    all_subfolders.append(item)
+            all_subfolders = list_subfolders(parent_dir)
         except Exception as e:
             messagebox.showerror("错误", f"读取文件夹失败: {str(e)}")
             return
@@ -305,43 +513,42 @@ class HomeworkCheckerApp:
             messagebox.showerror("错误", "选择的母文件夹不存在，请重新选择。")
             return
 
-        self.progress.start()
+        # 获取当前选中的格式（用于重命名，可选）
+        format_name = self.format_var.get()
+        format_config = self.config_manager.get_format_config(format_name) if format_name else None
+
         self.log("\n" + "=" * 60)
         self.log("开始批量检查汇总...")
         self.log(f"母文件夹: {self.batch_parent_var.get()}")
 
-        try:
-            # 获取当前选中的格式（用于重命名，可选）
-            format_name = self.format_var.get()
-            format_config = self.config_manager.get_format_config(format_name) if format_name else None
-
-            # 获取选择的子文件夹配置
-            folder_config = self.config_manager.load_folder_config(self.batch_parent_var.get())
-            selected_folders = None
-            if folder_config and 'selected_folders' in folder_config:
-                selected_folders = folder_config['selected_folders']
-                self.log(f"使用预设文件夹选择: {len(selected_folders)} 个文件夹")
-
-            # 调用处理器的批量检查方法
-            output_path = self.processor.batch_check_submissions(
-                roster_path=self.roster_var.get(),
-                parent_dir=self.batch_parent_var.get(),
-                rename_format=format_config,  # 可以为None，表示不重命名
-                selected_folders=selected_folders,  # 传递选择的文件夹
-                log_callback=self.log
-            )
+        # 获取选择的子文件夹配置
+        folder_config = self.config_manager.load_folder_config(self.batch_parent_var.get())
+        selected_folders = None
+        if folder_config and 'selected_folders' in folder_config:
+            selected_folders = folder_config['selected_folders']
+            self.log(f"使用预设文件夹选择: {len(selected_folders)} 个文件夹")
 
+        def on_success(output_path):
             self.log(f"✅ 批量汇总完成！报告已生成: {output_path}")
             messagebox.showinfo("批量检查完成",
                                 f"汇总报告已生成！\n\n"
                                 f"文件位置: {output_path}\n\n"
                                 f"报告包含所有子文件夹的提交状态统计。")
 
-        except Exception as e:
+        def on_error(e):
             self.log(f"❌ 批量检查失败: {str(e)}")
             messagebox.showerror("错误", f"批量检查失败:\n{str(e)}")
-        finally:
-            self.progress.stop()
+
+        # 调用处理器的批量检查方法
+        self.run_task(self.processor.batch_check_submissions, {
+            'roster_path': self.roster_var.get(),
+            'parent_dir': self.batch_parent_var.get(),
+            'rename_format': format_config,  # 可以为None，表示不重命名
+            'selected_folders': selected_folders,  # 传递选择的文件夹
+            'max_workers': BATCH_WORKERS,
+            'rename_workers': BATCH_WORKERS,
+            'max_depth': self.depth_var.get(),
+        }, on_success, on_error)
 
     def validate_inputs(self):
         if not self.roster_var.get():
@@ -359,9 +566,9 @@ class HomeworkCheckerApp:
         return True
 
     def log(self, message):
+        # 仅在界面线程调用；后台任务的日志经队列批量转发到这里
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)
-        self.root.update()
 
     def load_config(self):
         config = self.config_manager.load_app_config()
@@ -370,15 +577,28 @@ class HomeworkCheckerApp:
             self.homework_var.set(config.get('homework_dir', ''))
             self.output_var.set(config.get('output_dir', ''))
             self.format_var.set(config.get('format_name', ''))
+            self.content_hash_var.set(bool(config.get('content_hash', False)))
+            self.depth_var.set(int(config.get('max_depth', 0)))
+            self.stats_var.set(bool(config.get('show_stats', False)))
+            self.scan_index_var.set(bool(config.get('use_scan_index', False)))
 
     def save_config(self):
         config = {
             'roster_path': self.roster_var.get(),
             'homework_dir': self.homework_var.get(),
             'output_dir': self.output_var.get(),
-            'format_name': self.format_var.get()
+            'format_name': self.format_var.get(),
+            'content_hash': self.content_hash_var.get(),
+            'max_depth': self.depth_var.get(),
+            'show_stats': self.stats_var.get(),
+            'use_scan_index': self.scan_index_var.get()
         }
         self.config_manager.save_app_config(config)
+        try:
+            self.config_manager.flush()
+        except Exception as e:
+            messagebox.showerror("保存失败", str(e))
+            return
         messagebox.showinfo("成功", "配置已保存！")
 
     def quick_setup(self):
@@ -387,53 +607,107 @@ class HomeworkCheckerApp:
         选择花名册 -> 自动分析列 -> 创建基础格式 -> 自动填入路径。
         """
         roster_path = filedialog.askopenfilename(
-            title="选择你的花名册Excel文件",
-            filetypes=[("Excel文件", "*.xls *.xlsx")]
+            title="选择你的花名册文件",
+            filetypes=[ROSTER_FILETYPES]
         )
         if not roster_path:
             return
 
-        try:
-            # 读取并分析花名册
-            df = pd.read_excel(roster_path, dtype={'学号': str})
-            columns = df.columns.tolist()
+        def on_success(roster):
+            try:
+                self._apply_quick_setup(roster_path, roster.columns)
+            except Exception as e:
+                messagebox.showerror("配置失败", f"保存配置时出错：{str(e)}")
 
-            if '学号' not in columns or '姓名' not in columns:
-                messagebox.showerror("错误", f"花名册必须包含‘学号’和‘姓名’列！\n当前列：{', '.join(columns)}")
-                return
+        def on_error(e):
+            if isinstance(e, ValueError):
+                messagebox.showerror("错误", str(e))
+            else:
+                messagebox.showerror("配置失败", f"读取花名册时出错：{str(e)}")
 
-            # 1. 自动将花名册路径设置到主界面
-            self.roster_var.set(roster_path)
+        # 读取并分析花名册（解析结果会被缓存，后续检查无需再次解析）；大花名册解析较慢，放到后台执行
+        self.run_task(self._load_roster_task, {'roster_path': roster_path}, on_success, on_error)
 
-            # 2. 将花名册的列信息传递给配置管理器，保存为“当前可用变量”
-            self.config_manager.set_current_roster_columns(columns)
+    def _load_roster_task(self, roster_path, log_callback=None, progress_callback=None, cancel_event=None):
+        """后台任务：读取花名册索引"""
+        return self.processor.load_roster(roster_path)
 
-            # 3. 自动创建并保存几个最基础的格式（如果尚未存在）
-            base_formats = {
-                "标准格式(文件)": {"template": "{学号} {姓名}{扩展名}", "is_folder": False},
-                "标准格式(文件夹)": {"template": "{学号} {姓名}", "is_folder": True},
-            }
-            # 可选：如果花名册有“班级”列，额外创建一个格式
-            if '班级' in columns:
-                base_formats["含班级格式"] = {"template": "{姓名}_{班级}{扩展名}", "is_folder": False}
+    def _apply_quick_setup(self, roster_path, columns):
+        """花名册读取完成后（界面线程）：填入路径、保存可用变量、创建基础格式"""
+        # 1. 自动将花名册路径设置到主界面
+        self.roster_var.set(roster_path)
 
-            for name, config in base_formats.items():
-                self.config_manager.save_format(name, config)
+        # 2. 将花名册的列信息传递给配置管理器，保存为“当前可用变量”
+        self.config_manager.set_current_roster_columns(columns)
 
-            # 4. 更新主界面的格式下拉框，并选中第一个
-            self.refresh_formats()
-            self.format_var.set("标准格式(文件)")
+        # 3. 自动创建并保存几个最基础的格式（如果尚未存在）
+        base_formats = {
+            "标准格式(文件)": {"template": "{学号} {姓名}{扩展名}", "is_folder": False},
+            "标准格式(文件夹)": {"template": "{学号} {姓名}", "is_folder": True},
+        }
+        # 可选：如果花名册有“班级”列，额外创建一个格式
+        if '班级' in columns:
+            base_formats["含班级格式"] = {"template": "{姓名}_{班级}{扩展名}", "is_folder": False}
 
-            # 5. 保存此次快速配置的状态（主要是花名册路径）
-            self.save_config()
+        for name, config in base_formats.items():
+            self.config_manager.save_format(name, config)
 
-            messagebox.showinfo("配置成功",
-                                f"花名册【{os.path.basename(roster_path)}】已载入！\n"
-                                f"系统已识别可用变量：{', '.join(columns)}\n"
-                                f"已为您创建了基础格式，可直接使用或点击‘管理格式’进行编辑。")
+        # 4. 更新主界面的格式下拉框，并选中第一个
+        self.refresh_formats()
+        self.format_var.set("标准格式(文件)")
 
-        except Exception as e:
-            messagebox.showerror("配置失败", f"读取花名册时出错：{str(e)}")
+        # 5. 保存此次快速配置的状态（主要是花名册路径）
+        self.save_config()
+
+        messagebox.showinfo("配置成功",
+                            f"花名册【{os.path.basename(roster_path)}】已载入！\n"
+                            f"系统已识别可用变量：{', '.join(columns)}\n"
+                            f"已为您创建了基础格式，可直接使用或点击‘管理格式’进行编辑。")
+
+
+class RenamePreviewWindow:
+    """重命名预览窗口：列出计划中的每个条目及其预演状态（不改动任何文件）"""
+
+    COLUMNS = (('source', "原名称", 260), ('target', "新名称", 260), ('student', "学生", 90), ('status', "状态", 90))
+
+    def __init__(self, parent, plan):
+        self.parent = parent
+        self.plan = plan
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.parent.title(f"重命名预览 - {os.path.basename(self.plan.homework_dir)}")
+        self.parent.geometry("760x480")
+
+        main_frame = ttk.Frame(self.parent, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        statuses = self.plan.statuses
+        summary = (f"共 {len(self.plan)} 个条目：待重命名 {statuses.count(STATUS_RENAME)}，"
+                   f"无需改名 {statuses.count(STATUS_NOOP)}，冲突 {len(self.plan.conflicts)}")
+        if self.plan.pending_steps:
+            summary += f"\n上次重命名意外中断，执行时会先完成剩余的 {self.plan.pending_steps} 步"
+        ttk.Label(main_frame, text=summary).pack(anchor=tk.W, pady=(0, 5))
+
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        tree = ttk.Treeview(tree_frame, columns=[key for key, _, _ in self.COLUMNS], show='headings')
+        for key, heading, width in self.COLUMNS:
+            tree.heading(key, text=heading)
+            tree.column(key, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 冲突条目标红，无需改名的条目置灰
+        tree.tag_configure('conflict', foreground='red')
+        tree.tag_configure('noop', foreground='gray')
+        for entry, status in zip(self.plan.entries, statuses):
+            tag = 'noop' if status == STATUS_NOOP else ('' if status == STATUS_RENAME else 'conflict')
+            tree.insert('', tk.END, values=(entry.source, entry.target, entry.student, status), tags=(tag,))
+
+        ttk.Button(main_frame, text="关闭", command=self.parent.destroy).pack(pady=(10, 0))
 
 
 class FormatManagerWindow:
@@ -676,6 +950,12 @@ class EditFormatWindow:
         if is_folder and "{扩展名}" in template:
             messagebox.showerror("错误", "文件夹格式不能包含 {扩展名} 变量！")
             return
+        # 编译模板，提前发现花名册中不存在的变量
+        try:
+            compile_template(template, self.available_vars)
+        except TemplateError as e:
+            messagebox.showerror("错误", str(e))
+            return
 
         # 保存配置
         format_config = {
@@ -688,6 +968,11 @@ class EditFormatWindow:
             self.config_manager.delete_format(self.old_name)
 
         self.config_manager.save_format(name, format_config)
+        try:
+            self.config_manager.flush()
+        except Exception as e:
+            messagebox.showerror("保存失败", str(e))
+            return
 
         # 刷新回调
         self.load_formats_callback()
@@ -1092,6 +1377,7 @@ class FolderSelectorWindow:
 
         try:
             self.config_manager.save_folder_config(self.parent_dir, config)
+            self.config_manager.flush()
 
             # 更新主界面显示
             self.update_callback(final_ordered_folders)
@@ -1,9 +1,30 @@
+import argparse
 import tkinter as tk
-from gui import HomeworkCheckerApp 
+
+# 窗口显示后多久开始在后台预加载 numpy/openpyxl（毫秒）
+WARM_UP_DELAY_MS = 300
+
 
 def main():
+    parser = argparse.ArgumentParser(description="作业检查与重命名系统")
+    parser.add_argument("--import-time", action="store_true",
+                        help="测量启动时各模块的导入耗时（类似 python -X importtime）并输出摘要后退出")
+    parser.add_argument("--no-warm-up", action="store_true", help="不在后台预加载 numpy/openpyxl")
+    args = parser.parse_args()
+
+    if args.import_time:
+        from core.startup import format_import_report, measure_imports
+        print(format_import_report(measure_imports('gui')))
+        return
+
+    # 先显示窗口，重型依赖在首次使用时再导入，或在窗口显示后于后台预加载
+    from gui import HomeworkCheckerApp
+
     root = tk.Tk()
     app = HomeworkCheckerApp(root)
+    if not args.no_warm_up:
+        from core.startup import warm_up
+        root.after(WARM_UP_DELAY_MS, warm_up)
     root.mainloop()
 
 if __name__ == "__main__":
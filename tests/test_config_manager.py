@@ -0,0 +1,57 @@
+# tests/test_config_manager.py
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from core.config_manager import ConfigManager
+
+
+class ConfigManagerWriteTest(unittest.TestCase):
+    """延迟写盘：多次保存合并为一次写入；写入先落到临时文件，失败时不破坏原文件"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.config_dir = os.path.join(self._tmp.name, 'config')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _read(self, path: str):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_saves_are_coalesced_until_flush(self):
+        manager = ConfigManager(self.config_dir, write_delay=60)
+        with mock.patch.object(manager, '_write_atomic', wraps=manager._write_atomic) as write:
+            for value in range(5):
+                manager.save_app_config({'value': value})
+            self.assertFalse(os.path.exists(manager.app_config_file))
+            self.assertEqual(manager.load_app_config(), {'value': 4})
+
+            manager.flush()
+            self.assertEqual(write.call_count, 1)
+        self.assertEqual(self._read(manager.app_config_file), {'value': 4})
+
+    def test_failed_write_keeps_previous_file(self):
+        manager = ConfigManager(self.config_dir, write_delay=60)
+        manager.save_app_config({'value': 1})
+        manager.flush()
+
+        manager.save_app_config({'value': {1, 2}})  # 集合无法写成 JSON，写到一半失败
+        with self.assertRaises(Exception):
+            manager.flush()
+        self.assertEqual(self._read(manager.app_config_file), {'value': 1})
+        self.assertFalse(os.path.exists(manager.app_config_file + '.tmp'))
+        self.assertIsNotNone(manager.last_flush_error)
+
+        # 写入失败的配置仍保留在内存中，改正后下次写盘成功
+        manager.save_app_config({'value': 2})
+        manager.flush()
+        self.assertEqual(self._read(manager.app_config_file), {'value': 2})
+        self.assertIsNone(manager.last_flush_error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# tests/test_content_hash.py
+import os
+import tempfile
+import unittest
+
+from core.content_hash import find_identical
+from core.processor import HomeworkProcessor
+from core.roster_index import RosterIndex
+from core.submission_scan import discover_submissions, group_by_student
+
+
+class NestedContentHashTest(unittest.TestCase):
+    """递归查找到的深层文件也要按相对路径参与内容比对"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, 'LAB1')
+        self.processor = HomeworkProcessor(config_dir=os.path.join(self._tmp.name, 'config'),
+                                           use_scan_index=False)
+        self.roster = RosterIndex(['学号', '姓名'], [('2023001', '张三'), ('2023002', '李四'), ('2023003', '王五')])
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, relpath: str, content: bytes):
+        path = os.path.join(self.root, *relpath.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def _identical(self):
+        records = discover_submissions(self.root, self.roster.matcher, max_depth=1)
+        digests = self.processor._hash_submissions(records, False, 'blake2b', None)
+        return digests, find_identical(group_by_student(records), digests)
+
+    def test_same_file_in_two_subfolders(self):
+        self._write('一班/张三_作业.docx', b'same content')
+        self._write('二班/李四_作业.docx', b'same content')
+        self._write('二班/张三_补交.docx', b'same content')
+
+        digests, (within, across) = self._identical()
+
+        self.assertEqual(set(digests), {'一班/张三_作业.docx', '二班/李四_作业.docx', '二班/张三_补交.docx'})
+        self.assertEqual({student: [sorted(group) for group in groups] for student, groups in within.items()},
+                         {'张三': [['一班/张三_作业.docx', '二班/张三_补交.docx']]})
+        self.assertEqual(len(across), 1)
+        self.assertEqual(sorted(student for student, _ in across[0][1]), ['张三', '张三', '李四'])
+
+    def test_matched_folders_are_not_hashed(self):
+        self._write('一班/王五/报告.docx', b'folder content')
+        self._write('二班/张三_作业.docx', b'file content')
+
+        digests, _ = self._identical()
+
+        self.assertEqual(set(digests), {'二班/张三_作业.docx'})
+
+
+if __name__ == '__main__':
+    unittest.main()
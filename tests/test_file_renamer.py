@@ -0,0 +1,125 @@
+# tests/test_file_renamer.py
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from core.file_renamer import FileRenamer
+from core.rename_plan import PlanEntry, RenamePlan
+from core.roster_index import RosterIndex
+from core.task_runner import TaskCancelled
+
+STANDARD_FORMAT = {'template': '{学号}_{姓名}', 'is_folder': False}
+
+
+class FileRenamerTest(unittest.TestCase):
+    """在临时目录中实际改名：冲突跳过、循环互换、撤销、取消和崩溃后的续做"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.homework_dir = os.path.join(self._tmp.name, 'LAB1')
+        os.makedirs(self.homework_dir)
+        self.journal_dir = os.path.join(self._tmp.name, 'journals')
+        self.roster = RosterIndex(['学号', '姓名', '班级'], [('2023001', '张三', '一班'),
+                                                           ('2023002', '李四', '二班'),
+                                                           ('2023003', '王五', '三班')])
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _renamer(self) -> FileRenamer:
+        return FileRenamer(journal_dir=self.journal_dir)
+
+    def _write(self, name: str, content: str):
+        with open(os.path.join(self.homework_dir, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def _contents(self):
+        """当前目录：名称 → 文件内容"""
+        contents = {}
+        for name in os.listdir(self.homework_dir):
+            with open(os.path.join(self.homework_dir, name), encoding='utf-8') as f:
+                contents[name] = f.read()
+        return contents
+
+    def test_existing_target_is_left_alone(self):
+        self._write('张三的作业.txt', 'new')
+        self._write('一班_作业.txt', 'other')
+        count = self._renamer().rename_files(self.roster, self.homework_dir,
+                                             {'template': '{班级}_作业', 'is_folder': False})
+        self.assertEqual(count, 0)
+        self.assertEqual(self._contents(), {'张三的作业.txt': 'new', '一班_作业.txt': 'other'})
+
+    def test_swap_and_undo(self):
+        self._write('a.txt', 'A')
+        self._write('b.txt', 'B')
+        plan = RenamePlan(self.homework_dir, [PlanEntry('a.txt', 'b.txt', '张三'),
+                                              PlanEntry('b.txt', 'a.txt', '李四')], ['a.txt', 'b.txt'])
+        renamer = self._renamer()
+
+        self.assertEqual(renamer.apply_plan(plan), 2)
+        self.assertEqual(self._contents(), {'a.txt': 'B', 'b.txt': 'A'})
+
+        self.assertEqual(renamer.undo_last(self.homework_dir), 2)
+        self.assertEqual(self._contents(), {'a.txt': 'A', 'b.txt': 'B'})
+        with self.assertRaises(ValueError):
+            renamer.undo_last(self.homework_dir)
+
+    def test_cancel_then_rename_again_then_undo(self):
+        originals = {'张三作业.txt': '1', '李四作业.txt': '2', '王五作业.txt': '3'}
+        for name, content in originals.items():
+            self._write(name, content)
+        renamer = self._renamer()
+        cancel_event = threading.Event()
+
+        def cancel_after_first(message: str):
+            if message.startswith('重命名文件'):
+                cancel_event.set()
+
+        with self.assertRaises(TaskCancelled):
+            renamer.rename_files(self.roster, self.homework_dir, {'template': 'WRONG_{学号}', 'is_folder': False},
+                                 cancel_after_first, cancel_event)
+        after_cancel = self._contents()
+        self.assertEqual(len([name for name in after_cancel if name.startswith('WRONG_')]), 1)
+
+        # 取消的运行不会被续做：换用正确的模板后全部按新模板改名
+        self.assertEqual(renamer.preview(self.roster, self.homework_dir, STANDARD_FORMAT).pending_steps, 0)
+        self.assertEqual(renamer.rename_files(self.roster, self.homework_dir, STANDARD_FORMAT), 3)
+        self.assertEqual(self._contents(), {'2023001_张三.txt': '1', '2023002_李四.txt': '2',
+                                            '2023003_王五.txt': '3'})
+
+        # 撤销只回到取消时的状态；再撤销一次才撤掉被取消的运行中已完成的那一步
+        renamer.undo_last(self.homework_dir)
+        self.assertEqual(self._contents(), after_cancel)
+        self.assertEqual(renamer.undo_last(self.homework_dir), 1)
+        self.assertEqual(self._contents(), originals)
+
+    def test_interrupted_run_is_resumed(self):
+        for name, content in {'张三作业.txt': '1', '李四作业.txt': '2'}.items():
+            self._write(name, content)
+        real_rename = os.rename
+        calls = []
+
+        def crash_on_second(source, target):
+            calls.append(source)
+            if len(calls) == 2:
+                raise RuntimeError('模拟崩溃')
+            real_rename(source, target)
+
+        with mock.patch('core.file_renamer.os.rename', side_effect=crash_on_second):
+            with self.assertRaises(RuntimeError):
+                self._renamer().rename_files(self.roster, self.homework_dir, STANDARD_FORMAT)
+
+        renamer = self._renamer()
+        self.assertEqual(renamer.preview(self.roster, self.homework_dir, STANDARD_FORMAT).pending_steps, 1)
+        self.assertEqual(renamer.rename_files(self.roster, self.homework_dir, STANDARD_FORMAT), 1)
+        self.assertEqual(self._contents(), {'2023001_张三.txt': '1', '2023002_李四.txt': '2'})
+
+        # 续做的一步与崩溃前完成的一步属于同一次运行，一次撤销全部恢复
+        self.assertEqual(renamer.undo_last(self.homework_dir), 2)
+        self.assertEqual(self._contents(), {'张三作业.txt': '1', '李四作业.txt': '2'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# tests/test_rename_plan.py
+import unittest
+
+from core.rename_plan import (STATUS_DUPLICATE, STATUS_EXISTS, STATUS_NOOP, STATUS_RENAME, TEMP_PREFIX,
+                              PlanEntry, RenamePlan)
+
+
+def _plan(entries, existing=()):
+    sources = [entry.source for entry in entries]
+    return RenamePlan('hw', entries, list(existing) + sources)
+
+
+def _apply(names, operations):
+    """在内存中按顺序执行改名，返回最终名称集合（目标已被占用时报错）"""
+    names = set(names)
+    for source, target, _ in operations:
+        assert source in names and target not in names, (source, target, names)
+        names.remove(source)
+        names.add(target)
+    return names
+
+
+class RenamePlanTest(unittest.TestCase):
+    """预演只在内存中进行：冲突、循环和无需改名的条目都在执行前确定"""
+
+    def test_noop_is_not_executed(self):
+        plan = _plan([PlanEntry('2023001_张三.docx', '2023001_张三.docx', '张三')])
+        self.assertEqual(plan.statuses, [STATUS_NOOP])
+        self.assertEqual(plan.operations(), [])
+
+    def test_existing_target_is_a_conflict(self):
+        plan = _plan([PlanEntry('张三.docx', '2023001_张三.docx', '张三')], existing=['2023001_张三.docx'])
+        self.assertEqual(plan.statuses, [STATUS_EXISTS])
+        self.assertEqual(plan.operations(), [])
+
+    def test_target_freed_by_another_rename_is_not_a_conflict(self):
+        # b 先让出名称，a 才能改成 b
+        entries = [PlanEntry('a.docx', 'b.docx', '张三'), PlanEntry('b.docx', 'c.docx', '李四')]
+        plan = _plan(entries)
+        self.assertEqual(plan.statuses, [STATUS_RENAME, STATUS_RENAME])
+        self.assertEqual([(source, target) for source, target, _ in plan.operations()],
+                         [('b.docx', 'c.docx'), ('a.docx', 'b.docx')])
+
+    def test_duplicate_targets_keep_the_first(self):
+        entries = [PlanEntry('张三.docx', '2023001_张三.docx', '张三'),
+                   PlanEntry('张三 v2.docx', '2023001_张三.docx', '张三')]
+        self.assertEqual(_plan(entries).statuses, [STATUS_RENAME, STATUS_DUPLICATE])
+
+    def test_duplicate_target_prefers_the_entry_already_named_so(self):
+        entries = [PlanEntry('张三.docx', '2023001_张三.docx', '张三'),
+                   PlanEntry('2023001_张三.docx', '2023001_张三.docx', '张三')]
+        self.assertEqual(_plan(entries).statuses, [STATUS_DUPLICATE, STATUS_NOOP])
+
+    def test_swap_cycle_goes_through_a_temp_name(self):
+        entries = [PlanEntry('a.docx', 'b.docx', '张三'), PlanEntry('b.docx', 'a.docx', '李四')]
+        plan = _plan(entries)
+        self.assertEqual(plan.statuses, [STATUS_RENAME, STATUS_RENAME])
+
+        operations = plan.operations()
+        self.assertEqual(len(operations), 3)
+        self.assertTrue(operations[0][1].startswith(TEMP_PREFIX))
+        self.assertEqual(_apply(['a.docx', 'b.docx'], operations), {'a.docx', 'b.docx'})
+        # 临时名称最终落到条目自己的目标上
+        final = {entry.source: target for _, target, entry in operations}
+        self.assertEqual(final, {'a.docx': 'b.docx', 'b.docx': 'a.docx'})
+
+    def test_temp_name_avoids_existing_names(self):
+        entries = [PlanEntry('a.docx', 'b.docx', '张三'), PlanEntry('b.docx', 'a.docx', '李四')]
+        taken = f"{TEMP_PREFIX}1_b.docx"
+        operations = _plan(entries, existing=[taken]).operations()
+        self.assertNotEqual(operations[0][1], taken)
+        self.assertEqual(_apply(['a.docx', 'b.docx', taken], operations), {'a.docx', 'b.docx', taken})
+
+
+if __name__ == '__main__':
+    unittest.main()
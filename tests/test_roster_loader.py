@@ -0,0 +1,71 @@
+# tests/test_roster_loader.py
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from core.roster_loader import CsvRosterLoader, get_loader, load_roster_index, read_roster
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class RosterLoaderTest(unittest.TestCase):
+    """轻量后端（openpyxl/csv）直接产出行元组，不导入 pandas"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._tmp.name, name)
+
+    def _read_without_pandas(self, path: str):
+        # pandas 被置为不可导入：轻量后端若退回 pandas 会直接失败
+        with mock.patch.dict('sys.modules', {'pandas': None}):
+            columns, rows = read_roster(path)
+            return columns, list(rows)
+
+    def test_csv_keeps_ids_as_text(self):
+        path = self._path('roster.csv')
+        with open(path, 'w', encoding='gb18030', newline='') as f:
+            f.write('学号,姓名,班级\n00123,张三,一班\n\n00124,李四,\n')
+        self.assertIsInstance(get_loader(path), CsvRosterLoader)
+        columns, rows = self._read_without_pandas(path)
+        self.assertEqual(columns, ['学号', '姓名', '班级'])
+        self.assertEqual(rows, [('00123', '张三', '一班'), ('00124', '李四', None)])
+
+    @unittest.skipIf(openpyxl is None, "需要 openpyxl")
+    def test_xlsx_matches_pandas_conventions(self):
+        path = self._path('roster.xlsx')
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['学号', '姓名', '成绩', '成绩', None])
+        sheet.append([2023001, '张三', 90.0, 1.5, None])
+        sheet.append([None, None, None, None, None])
+        sheet.append([2023002.0, '李四', None, None, None])
+        workbook.save(path)
+
+        columns, rows = self._read_without_pandas(path)
+        # 重复列名加后缀，尾部空列去掉，整数值的浮点数转为 int，学号转为文本，全空行跳过
+        self.assertEqual(columns, ['学号', '姓名', '成绩', '成绩.1'])
+        self.assertEqual(rows, [('2023001', '张三', 90, 1.5), ('2023002', '李四', None, None)])
+
+    @unittest.skipIf(openpyxl is None, "需要 openpyxl")
+    def test_load_roster_index(self):
+        path = self._path('roster.xlsx')
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['学号', '姓名'])
+        workbook.active.append([2023001, '张三'])
+        workbook.save(path)
+        with mock.patch.dict('sys.modules', {'pandas': None}):
+            roster = load_roster_index(path)
+        self.assertEqual(roster.name_to_id, {'张三': '2023001'})
+
+
+if __name__ == '__main__':
+    unittest.main()
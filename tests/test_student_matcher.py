@@ -0,0 +1,37 @@
+# tests/test_student_matcher.py
+import unittest
+
+from core.student_matcher import StudentMatcher
+
+
+class StudentMatcherPriorityTest(unittest.TestCase):
+    """优先级：被更长命中覆盖的命中不计，其余先姓名后学号、同类按花名册顺序"""
+
+    def setUp(self):
+        self.matcher = StudentMatcher(['张三', '张三丰', '李四'],
+                                      {'2023001': '张三', '2023002': '张三丰', '2023003': '李四'})
+
+    def test_longer_name_wins_over_contained_name(self):
+        self.assertEqual(self.matcher.match_all('张三丰_实验一.docx'), ['张三丰'])
+        self.assertEqual(self.matcher.match('张三丰_实验一.docx'), '张三丰')
+
+    def test_separate_occurrences_are_all_reported(self):
+        self.assertEqual(self.matcher.match_all('张三丰_张三.docx'), ['张三', '张三丰'])
+
+    def test_name_before_id(self):
+        self.assertEqual(self.matcher.match_all('2023003_张三.docx'), ['张三', '李四'])
+        self.assertEqual(self.matcher.match('2023003_张三.docx'), '张三')
+
+    def test_id_alone(self):
+        self.assertEqual(self.matcher.match('2023002.docx'), '张三丰')
+
+    def test_roster_order_between_names(self):
+        self.assertEqual(self.matcher.match('李四_张三.docx'), '张三')
+
+    def test_no_match(self):
+        self.assertEqual(self.matcher.match_all('readme.txt'), [])
+        self.assertIsNone(self.matcher.match('readme.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+# tests/test_submission_scan.py
+import os
+import tempfile
+import unittest
+
+from core.dir_scan import scan_dir
+from core.roster_index import RosterIndex
+from core.submission_scan import discover_submissions, scan_submissions
+
+
+class DiscoverTopLevelTest(unittest.TestCase):
+    """递归查找时第一层的取舍要与 max_depth=0 的 scan_submissions 一致"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.matcher = RosterIndex(['学号', '姓名'], [('2023001', '张三'), ('2023002', '李四'),
+                                                    ('2023003', '王五')]).matcher
+        for name in ('张三_作业.docx', '~$李四_作业.docx', '.王五_作业.docx'):
+            self._touch(name)
+        for name in ('李四_实验', '.王五_备份'):
+            os.makedirs(os.path.join(self.root, name))
+        self._touch('一班/王五_作业.docx')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _touch(self, relpath: str):
+        path = os.path.join(self.root, *relpath.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+
+    def _names(self, is_folder_project: bool, max_depth: int):
+        records = discover_submissions(self.root, self.matcher, max_depth, is_folder_project=is_folder_project)
+        return sorted(record.name for record in records)
+
+    def test_top_level_matches_depth_zero(self):
+        snapshot = scan_dir(self.root)
+        for is_folder_project in (False, True):
+            with self.subTest(is_folder_project=is_folder_project):
+                expected = sorted(record.name for record in
+                                  scan_submissions(snapshot, self.matcher, is_folder_project))
+                self.assertEqual(self._names(is_folder_project, 0), expected)
+
+    def test_deeper_levels_are_searched(self):
+        self.assertEqual(self._names(False, 1), ['.王五_作业.docx', '一班/王五_作业.docx', '张三_作业.docx'])
+        self.assertEqual(self._names(True, 1), ['.王五_备份', '一班/王五_作业.docx', '李四_实验'])
+
+
+if __name__ == '__main__':
+    unittest.main()